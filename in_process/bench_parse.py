@@ -0,0 +1,129 @@
+# pylint: disable=W1514
+# pylint: disable=C0114
+# pylint: disable=C0116
+
+"""Benchmark of cyber_news.parse_articles (compiled extraction plans) against
+the full-tree BeautifulSoup reference parser.
+
+Pages come from the retrieve_html snapshot store in ./dump (the latest capture
+of each configured source, or old ./dump/<url>.html files). With no saved
+pages, or with --synthetic, 1 MB stand-ins for each source are generated.
+
+    python bench_parse.py
+    python bench_parse.py --synthetic --size 2
+    python bench_parse.py --parser lxml
+
+Outputs are compared with the reference parser; on broken markup the plans
+can differ (see cyber_news.PARSER_BACKEND).
+"""
+import os
+import gzip
+import time
+import random
+import sqlite3
+import argparse
+import cyber_news
+
+DUMP_DIR = './dump'
+
+# Function to load the latest saved page of each configured source from ./dump
+def load_dump(sources, dump_dir=DUMP_DIR):
+    pages = {}
+    index = os.path.join(dump_dir, 'snapshots.sqlite3')
+    if os.path.exists(index):
+        conn = sqlite3.connect(index)
+        rows = conn.execute('SELECT url, sha256 FROM snapshots ORDER BY fetched_at').fetchall()
+        conn.close()
+        for url, sha256 in rows:  # Later captures replace earlier ones
+            path = os.path.join(dump_dir, 'objects', sha256[:2], sha256 + '.html.gz')
+            if url in sources and os.path.exists(path):
+                pages[url] = path
+    for url in sources:  # Files written by retrieve_html before the snapshot store
+        path = os.path.join(dump_dir, url.split('//')[1].replace('/', '_') + '.html')
+        if url not in pages and os.path.exists(path):
+            pages[url] = path
+    loaded = {}
+    for url, path in pages.items():
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rt', encoding='utf-8', errors='replace') as file:
+            loaded[url] = file.read()
+    return loaded
+
+# Function to generate a homepage-sized page whose articles match a source's config
+def synthetic_page(config, size_mb=1.0, articles=60, seed=0):
+    rng = random.Random(seed)
+    article_class = f' class="{config["article_class"]} card"' if config['article_class'] else ''
+    title_class = f' class="{config["title_class"]}"' if config['title_class'] else ''
+    filler = '<div class="promo"><p>Sponsored &amp; related <b>content</b> <!-- ad --> &nbsp;</p><ul>' + '<li><a href="/x">More</a></li>' * 5 + '</ul></div>'
+    parts = ['<!DOCTYPE html><html><head><title>News</title><script>var a = "<h2>";</script><style>h2{}</style></head><body>']
+    for number in range(articles):
+        title = f'Story {number}: CVE-{rng.randint(2000, 2030)}-{rng.randint(1000, 99999)} &amp; more'
+        if config['title_tag'] == 'a':
+            inner = f'<a{title_class} href="/story/{number}">  {title} <em>x</em></a>'
+        else:
+            inner = f'<{config["title_tag"]}{title_class}><a href="/story/{number}">{title}</a></{config["title_tag"]}>'
+        parts.append(f'<div class="col"><{config["article_tag"]}{article_class}>{inner}</{config["article_tag"]}>{filler * 3}</div>')
+    page = ''.join(parts)
+    while len(page) < size_mb * 1024 * 1024:
+        page += filler * 50
+    return page + '</body></html>'
+
+# Function to time a parser on one page: best of `repeat` runs, in ms
+def best_ms(parse, html, config, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(html, config)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark cyber_news article extraction.')
+    parser.add_argument('--synthetic', action='store_true', help='generate pages even when ./dump has some')
+    parser.add_argument('--size', type=float, default=1.0, help='MB per synthetic page')
+    parser.add_argument('--parser', choices=('bs4', 'lxml'), default=cyber_news.PARSER_BACKEND, help='extraction plan backend')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per page; the best is kept')
+    args = parser.parse_args()
+    cyber_news.use_backend(args.parser)
+
+    sources = cyber_news.load_config()['sources']
+    pages = {} if args.synthetic else load_dump(sources)
+    origin = './dump'
+    if not pages:
+        pages = {url: synthetic_page(config, args.size, seed=i) for i, (url, config) in enumerate(sources.items())}
+        origin = f'synthetic {args.size:g} MB pages'
+    print(f'{len(pages)} pages from {origin}; parser backend: {cyber_news.PARSER_BACKEND}\n')
+
+    mismatches = 0
+    totals = [0.0, 0.0]
+    print(f'{"source":45} {"KB":>7} {"articles":>8} {"reference ms":>13} {"plan ms":>8} {"speedup":>8}')
+    for url, html in pages.items():
+        config = sources[url]
+        expected = cyber_news.parse_articles_reference(html, config)
+        got = cyber_news.parse_articles(html, config)
+        if got != expected:
+            mismatches += 1
+            print(f'MISMATCH {url}: {len(got)} articles vs {len(expected)} from the reference')
+        reference = best_ms(cyber_news.parse_articles_reference, html, config, args.repeat)
+        plan = best_ms(cyber_news.parse_articles, html, config, args.repeat)
+        totals[0] += reference
+        totals[1] += plan
+        print(f'{url[:45]:45} {len(html) / 1024:7.0f} {len(expected):8} {reference:13.1f} {plan:8.1f} {reference / plan:7.1f}x')
+    print(f'{"total":45} {"":7} {"":8} {totals[0]:13.1f} {totals[1]:8.1f} {totals[0] / totals[1]:7.1f}x')
+
+    # The whole sweep's parsing: one thread after another vs the process pool the scraper uses
+    items = [(html, sources[url]) for url, html in pages.items()]
+    start = time.perf_counter()
+    for html, config in items:
+        cyber_news.parse_articles(html, config)
+    serial = time.perf_counter() - start
+    with cyber_news.start_parse_pool() as pool:
+        start = time.perf_counter()
+        list(pool.map(cyber_news.parse_articles, *zip(*items)))
+        pooled = time.perf_counter() - start
+    print(f'\nAll pages, plans: {serial * 1000:.0f} ms in one process, {pooled * 1000:.0f} ms over {cyber_news.PARSE_WORKERS} worker processes')
+    print('All plans match the reference output.' if not mismatches else f'{mismatches} page(s) differ from the reference.')
+    return 1 if mismatches else 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -7,8 +7,79 @@
 # pylint: disable=C0411
 
 import requests  # For making HTTP requests to fetch web pages
-from bs4 import BeautifulSoup  # For parsing HTML and extracting data
+from requests.adapters import HTTPAdapter  # For sizing the shared connection pool
+from bs4 import BeautifulSoup, SoupStrainer  # For parsing HTML and extracting data
+import re  # For matching class names in the bs4 strainer
 import json  # For working with JSON files (read, write, etc.)
+import time  # For timing the sweep against its deadline
+import sqlite3  # For the persistent set of articles already seen
+import argparse  # For the command-line options
+import threading  # For the per-domain concurrency limits
+import socket  # For cutting off a body still arriving at the sweep deadline
+import xml.etree.ElementTree as ElementTree  # For parsing RSS and Atom feeds
+from datetime import datetime, timezone  # For timestamping first sightings
+from urllib.parse import urljoin, urlsplit  # For absolute article links and each source's domain
+import os  # For sizing the parser pool
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait  # For fetching all sources at once and parsing in parallel
+
+try:  # lxml is optional: a C parser and compiled XPath, several times faster than html.parser
+    import lxml.html
+    from lxml import etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# Extraction plan backend. 'bs4' parses only the article tags with html.parser;
+# 'lxml' (opt-in) is much faster. Both give parse_articles_reference's output on
+# well-formed pages, but broken markup can be repaired differently: lxml
+# rebuilds the tree its own way, and the bs4 strainer ignores end tags of
+# elements outside the article tags, so an unclosed article can run on
+PARSER_BACKEND = 'bs4'
+
+# Fetch settings: every source is fetched at the same time, so a sweep takes
+# about as long as the slowest site, and never longer than SWEEP_DEADLINE
+MAX_WORKERS = 20  # Sources fetched at once
+PER_DOMAIN_LIMIT = 2  # Requests in flight per domain
+REQUEST_TIMEOUT = 10  # Seconds to connect and for each read
+SWEEP_DEADLINE = 15  # Seconds for the whole sweep; bodies still arriving then are cut off
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.36'
+
+# Output: one JSON line per article, appended as soon as its source is parsed
+JSONL_FILE = 'scraped_news.jsonl'
+JSON_FILE = 'scraped_news.json'  # Consolidated export of a run, with --export-json
+FSYNC_INTERVAL = 5  # Seconds between fsyncs of the JSONL file
+ROTATE_BYTES = 50 * 1024 * 1024  # The JSONL file is rotated to .1, .2, ... past this size
+ROTATE_KEEP = 5  # Rotated files kept
+
+# Incremental mode: only articles not seen in an earlier run are emitted
+SEEN_DB = 'cyber_news_seen.sqlite3'
+NEW_ARTICLES_FILE = 'new_articles.jsonl'
+NEW_ARTICLES_JSON = 'new_articles.json'
+FEED_TYPES = ('application/rss+xml', 'application/atom+xml')  # <link rel="alternate"> types we can read
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+SEEN_SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen (
+    link TEXT PRIMARY KEY,
+    source TEXT,
+    title TEXT,
+    first_seen TEXT
+);
+CREATE TABLE IF NOT EXISTS sources (
+    site TEXT PRIMARY KEY,
+    feed_url TEXT,  -- NULL: not looked for yet, '': the site has none
+    etag TEXT,  -- Validators of the last fetch of the feed (or homepage, without one)
+    last_modified TEXT,
+    checked_at TEXT
+);
+"""
+
+# Parsing runs in worker processes while the fetch threads carry on
+PARSE_WORKERS = os.cpu_count() or 1
+
+_domain_slots = {}  # Domain -> semaphore limiting its requests in flight
+_domain_slots_lock = threading.Lock()
+_plans = threading.local()  # Compiled extraction plans, per thread (lxml XPath objects aren't shared)
 
 # Function to load configuration data from a JSON file
 def load_config(config_file='cyber_news_config.json'):
@@ -25,52 +96,438 @@ def load_config(config_file='cyber_news_config.json'):
         print(f"Configuration file '{config_file}' not found.")
         return None
 
-# Function to fetch HTML content from a URL with a User-Agent header
-def fetch_html(url):
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.36'
-    }
+# Function to create one HTTP session whose connection pool all fetches share
+def create_session(pool_size=MAX_WORKERS):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=PER_DOMAIN_LIMIT)  # One pool per host, kept alive between requests
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['User-Agent'] = USER_AGENT
+    return session
+
+# Function to get the semaphore that limits concurrent requests to a URL's domain
+def domain_slot(url):
+    domain = urlsplit(url).hostname or ''
+    with _domain_slots_lock:
+        if domain not in _domain_slots:
+            _domain_slots[domain] = threading.Semaphore(PER_DOMAIN_LIMIT)
+        return _domain_slots[domain]
+
+# Function to read a streamed response's body, cutting it off at deadline_at; returns False if cut off
+def read_body(response, deadline_at):
+    # requests' timeout applies to each read, so a server dripping bytes could hold the
+    # thread long past the deadline. A timer shuts the socket down then, ending the read
+    connection = response.raw.connection
+    lock = threading.Lock()
+    state = {'reading': True, 'cut': False}
+
+    def cut():
+        with lock:
+            if state['reading'] and response.raw.connection is connection and connection.sock is not None:
+                state['cut'] = True
+                try:
+                    connection.sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+    timer = threading.Timer(max(0.0, deadline_at - time.monotonic()), cut)
+    timer.daemon = True
+    timer.start()
+    try:
+        response.content  # Reads the whole body
+    except requests.RequestException:
+        if not state['cut']:
+            raise
+    finally:
+        with lock:
+            state['reading'] = False
+        timer.cancel()
+    if state['cut']:
+        response.close()  # The body is incomplete and the connection unusable
+    return not state['cut']
+
+# Function to fetch a URL with a User-Agent header; returns the response (200 or 304) or None
+def fetch_response(url, session=None, deadline_at=None, headers=None):
     try:
-        response = requests.get(url, headers=headers, timeout=10)  # Added User-Agent header
-        response.raise_for_status()
-        return response.text  # Return the HTML content of the page
+        with domain_slot(url):  # Wait for a free slot on this domain
+            timeout = REQUEST_TIMEOUT
+            if deadline_at is not None:
+                timeout = min(timeout, deadline_at - time.monotonic())  # Don't outlive the sweep
+                if timeout <= 0:
+                    print(f"Skipped {url}: the sweep deadline passed while waiting for its domain")
+                    return None
+            if session is None:
+                response = requests.get(url, headers={'User-Agent': USER_AGENT, **(headers or {})}, timeout=timeout, stream=True)
+            else:
+                response = session.get(url, headers=headers, timeout=timeout, stream=True)
+            if deadline_at is None:
+                response.content  # Reads the whole body
+            elif not read_body(response, deadline_at):
+                print(f"Cut off {url}: the sweep deadline passed while its page was arriving")
+                return None
+        if response.status_code != 304:
+            response.raise_for_status()
+        return response
     except requests.RequestException as e:
         print(f"Error fetching {url}: {e}")
         return None
 
-# Function to parse the articles from the HTML content based on the configuration
-def parse_articles(html, config):
+# Function to fetch HTML content from a URL with a User-Agent header
+def fetch_html(url, session=None, deadline_at=None):
+    response = fetch_response(url, session, deadline_at)
+    return response.text if response is not None else None  # Return the HTML content of the page
+
+# Function to find an article's title link: the title tag itself when it's an <a>, else the first <a> in it
+def _title_link(title_tag):
+    link_tag = title_tag if title_tag.name == 'a' else title_tag.a
+    return link_tag if link_tag is not None and link_tag.get('href') else None
+
+# Reference parser: the whole page as one BeautifulSoup tree, searched with find_all
+def parse_articles_reference(html, config):
     soup = BeautifulSoup(html, 'html.parser')  # Parse the HTML using BeautifulSoup
     articles = []  # Initialize an empty list to store the article information
-    
-    # Find all article tags based on the config (e.g., <h2> or <article>)
-    for article_tag in soup.find_all(config['article_tag'], class_=config['article_class']):
+
+    # Find all article tags based on the config (e.g., <h2> or <article>); an empty class matches any
+    for article_tag in soup.find_all(config['article_tag'], class_=config['article_class'] or None):
         # Find the title tag inside the article (e.g., <h2> or <a>)
-        title_tag = article_tag.find(config['title_tag'], class_=config['title_class'])
-        
+        title_tag = article_tag.find(config['title_tag'], class_=config['title_class'] or None)
+
         # If we find the title tag and it contains a link
-        if title_tag and title_tag.a:
+        link_tag = _title_link(title_tag) if title_tag else None
+        if link_tag is not None:
             # Extract the title text and the link URL
-            title = title_tag.a.get_text(strip=True)
-            link = title_tag.a['href']
-            articles.append({'title': title, 'link': link})  # Add the title and link to our list of articles
-    
+            articles.append({'title': link_tag.get_text(strip=True), 'link': link_tag['href']})
+
     return articles  # Return the list of articles found
 
-# Main function to scrape news from all websites
-def scrape_news(config):
-    all_articles = {}  # Dictionary to store articles from all websites
-    
-    # Loop through each website listed in the config
-    for site, site_config in config['sources'].items():
-        print(f"Scraping {site}...")  # Print a message to show progress
-        html = fetch_html(site)  # Fetch the HTML content from the website
-        if html:
-            # Parse the articles for the current website and store them
-            articles = parse_articles(html, site_config)
-            all_articles[site] = articles  # Add articles to our dictionary
-    
-    return all_articles  # Return the dictionary containing all articles
+# Function to build the XPath test for "has this class" (class attributes hold space-separated names)
+def _xpath_class(class_name):
+    return ''.join(f"[contains(concat(' ', normalize-space(@class), ' '), ' {name} ')]" for name in class_name.split())
+
+# Function to choose the extraction plan backend ('bs4' or 'lxml') for this process
+def use_backend(backend):
+    global PARSER_BACKEND
+    if backend == 'lxml' and not LXML_AVAILABLE:
+        print("lxml is not installed; parsing with bs4")
+        backend = 'bs4'
+    PARSER_BACKEND = backend
+
+# Function to compile a source's config into an extraction plan (for PARSER_BACKEND by default)
+def compile_plan(config, backend=None):
+    backend = backend or PARSER_BACKEND
+    if backend == 'lxml' and not LXML_AVAILABLE:
+        backend = 'bs4'
+    article_tag, article_class = config['article_tag'], config['article_class']
+    title_tag, title_class = config['title_tag'], config['title_class']
+    plan = {
+        'backend': backend,
+        # bs4: only the article tags (and what's inside them) are built into a tree. The
+        # strainer may see the raw class attribute ("entry-title card"), so it matches a whole word
+        'strainer': SoupStrainer(article_tag, class_=re.compile(rf'(?:^|\s){re.escape(article_class)}(?:\s|$)') if article_class else None),
+        'article_tag': article_tag,
+        'article_class': article_class or None,
+        'title_tag': title_tag,
+        'title_class': title_class or None,
+    }
+    if backend == 'lxml':
+        # lxml: the page is parsed in C and the article, title and link lookups are precompiled XPath
+        plan['articles'] = etree.XPath(f'//{article_tag}{_xpath_class(article_class)}')
+        plan['title'] = etree.XPath(f'descendant::{title_tag}{_xpath_class(title_class)}[1]')
+        plan['link'] = etree.XPath("self::a[@href != '']" if title_tag == 'a' else "(descendant::a)[1][@href != '']")
+    return plan
+
+# Function to get a source's extraction plan, compiling it the first time this thread needs it
+def plan_for(config, backend=None):
+    backend = backend or PARSER_BACKEND
+    cache = _plans.__dict__.setdefault('cache', {})
+    key = (backend, config['article_tag'], config['article_class'], config['title_tag'], config['title_class'])
+    if key not in cache:
+        cache[key] = compile_plan(config, backend)
+    return cache[key]
+
+# Function to parse the articles from the HTML content based on the configuration
+def parse_articles(html, config, backend=None):
+    plan = plan_for(config, backend)
+    articles = []  # Initialize an empty list to store the article information
+    if plan['backend'] == 'lxml':
+        if not html.strip():
+            return articles
+        root = lxml.html.document_fromstring(html.encode('utf-8'), parser=lxml.html.HTMLParser(encoding='utf-8'))
+        for article_tag in plan['articles'](root):
+            title_tag = plan['title'](article_tag)
+            link_tag = plan['link'](title_tag[0]) if title_tag else None
+            if link_tag:
+                # Same text as bs4's get_text(strip=True): every text piece stripped, then joined
+                title = ''.join(text.strip() for text in link_tag[0].itertext())
+                articles.append({'title': title, 'link': link_tag[0].get('href')})
+        return articles
+
+    soup = BeautifulSoup(html, 'html.parser', parse_only=plan['strainer'])
+    for article_tag in soup.find_all(plan['article_tag'], class_=plan['article_class']):
+        title_tag = article_tag.find(plan['title_tag'], class_=plan['title_class'])
+        link_tag = _title_link(title_tag) if title_tag else None
+        if link_tag is not None:
+            articles.append({'title': link_tag.get_text(strip=True), 'link': link_tag['href']})
+    return articles
+
+# Function to find a page's RSS/Atom feed from its <link rel="alternate"> tags
+def discover_feed(html, site):
+    soup = BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer('link'))  # Only the <link> tags
+    for link_tag in soup.find_all('link', href=True):
+        rel = link_tag.get('rel') or []
+        if 'alternate' in rel and link_tag.get('type', '').lower() in FEED_TYPES:
+            return urljoin(site, link_tag['href'])
+    return None
+
+# Function to read the articles of an RSS or Atom feed
+def parse_feed(content, feed_url):
+    root = ElementTree.fromstring(content)
+    articles = []
+    for item in root.iter('item'):  # RSS
+        title, link = item.findtext('title'), item.findtext('link')
+        if title and link:
+            articles.append({'title': title.strip(), 'link': urljoin(feed_url, link.strip())})
+    for entry in root.iter(ATOM + 'entry'):  # Atom
+        title = entry.findtext(ATOM + 'title')
+        links = [link for link in entry.iter(ATOM + 'link') if link.get('rel', 'alternate') == 'alternate' and link.get('href')]
+        if title and links:
+            articles.append({'title': title.strip(), 'link': urljoin(feed_url, links[0].get('href'))})
+    return articles
+
+# Function to start the parser processes; call it before any fetch threads start
+def start_parse_pool(workers=PARSE_WORKERS, backend=None):
+    pool = ProcessPoolExecutor(workers, initializer=use_backend, initargs=(backend or PARSER_BACKEND,))
+    pool.submit(int).result()  # Where processes are forked, every worker starts now, while this is the only thread
+    return pool
+
+# Function to parse a page in the parser pool (or right here without one)
+def parse_page(parse_pool, html, site_config):
+    if parse_pool is None:
+        return parse_articles(html, site_config)
+    return parse_pool.submit(parse_articles, html, site_config).result()  # This thread waits; the others keep fetching
+
+# Function to fetch and parse one website; runs in a worker thread
+def scrape_site(session, site, site_config, deadline_at, parse_pool=None):
+    print(f"Scraping {site}...")  # Print a message to show progress
+    html = fetch_html(site, session, deadline_at)  # Fetch the HTML content from the website
+    if html is None:
+        return None
+    return parse_page(parse_pool, html, site_config)  # Parse the articles for the current website
+
+# Function to check one website for articles cheaply; runs in a worker thread
+def scrape_site_incremental(session, site, site_config, deadline_at, state, parse_pool=None):
+    """Returns (articles, state, bytes received); articles is [] when nothing changed.
+
+    Reads the site's feed when it has one (from the config's "feed" key or
+    found on its homepage) and its homepage otherwise, both with conditional
+    GETs, so an unchanged source costs a 304.
+    """
+    state = dict(state or {'feed_url': None, 'etag': None, 'last_modified': None})
+    feed_url = site_config.get('feed') or state['feed_url']
+    url = feed_url or site
+    headers = {}
+    if state['etag']:
+        headers['If-None-Match'] = state['etag']
+    if state['last_modified']:
+        headers['If-Modified-Since'] = state['last_modified']
+    print(f"Checking {url}...")  # Print a message to show progress
+    response = fetch_response(url, session, deadline_at, headers)
+    if response is None:
+        return None
+    state['checked_at'] = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    if response.status_code == 304:
+        return [], state, 0
+    state['etag'] = response.headers.get('etag')
+    state['last_modified'] = response.headers.get('last-modified')
+
+    if feed_url:
+        try:
+            return parse_feed(response.content, feed_url), state, len(response.content)
+        except ElementTree.ParseError as e:
+            print(f"Could not read the feed {feed_url}: {e}; using the homepage next time")
+            state.update(feed_url='' if not site_config.get('feed') else feed_url, etag=None, last_modified=None)
+            return [], state, len(response.content)  # Recorded like any other check, so the fallback sticks
+    articles = [
+        {'title': article['title'], 'link': urljoin(site, article['link'])}
+        for article in parse_page(parse_pool, response.text, site_config)
+    ]
+    if state['feed_url'] is None:
+        state['feed_url'] = discover_feed(response.text, site) or ''
+        if state['feed_url']:
+            print(f"Found a feed for {site}: {state['feed_url']}")
+            state.update(etag=None, last_modified=None)  # The validators were the homepage's
+    return articles, state, len(response.content)
+
+# Function to run scrape(session, site, site_config, deadline_at) for every website at once
+def run_sweep(sources, scrape, deadline=SWEEP_DEADLINE):
+    results = {}  # Website -> what scrape returned
+    start = time.monotonic()
+    session = create_session(len(sources))
+    executor = ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(sources)) or 1)
+
+    # Start every website's fetch, then take whatever has finished by the deadline
+    futures = {
+        executor.submit(scrape, session, site, site_config, start + deadline): site
+        for site, site_config in sources.items()
+    }
+    done, not_done = wait(futures, timeout=deadline)
+    for future in done:
+        site = futures[future]
+        try:
+            result = future.result()
+        except Exception as e:  # A parse error on one site shouldn't lose the others
+            print(f"Error scraping {site}: {e}")
+            continue
+        if result is not None:
+            results[site] = result
+    for future in not_done:
+        print(f"Timed out: {futures[future]} (no result within {deadline}s)")
+
+    # Don't wait for the stragglers; their reads are cut off at the deadline
+    executor.shutdown(wait=False, cancel_futures=True)
+    print(f"Scraped {len(results)}/{len(sources)} sources in {time.monotonic() - start:.1f}s")
+    return results
+
+# Main function to scrape news from all websites at once
+def scrape_news(config, deadline=SWEEP_DEADLINE, parse_pool=None, sink=None):
+    """Returns {website: articles}. With a sink, each website's articles are
+    written to it as soon as they are parsed and only their count is kept."""
+    def scrape(session, site, site_config, deadline_at):
+        articles = scrape_site(session, site, site_config, deadline_at, parse_pool)
+        if sink is None or articles is None:
+            return articles
+        sink.write(site, articles)
+        return len(articles)
+
+    all_articles = run_sweep(config['sources'], scrape, deadline)  # Website -> its articles
+    return dict(sorted(all_articles.items()))  # Return the dictionary containing all articles, in a stable order
+
+# Function to open the seen-set database, creating it if needed
+def open_seen_db(path=SEEN_DB):
+    conn = sqlite3.connect(path, check_same_thread=False)  # Written from the fetch threads, one at a time
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SEEN_SCHEMA)
+    return conn
+
+# Function to record a source's articles as seen; returns the ones not seen before
+def mark_seen(conn, site, articles):
+    now = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    new_articles = []
+    with conn:
+        for article in articles:
+            cursor = conn.execute(
+                'INSERT OR IGNORE INTO seen VALUES (?, ?, ?, ?)', (article['link'], site, article['title'], now)
+            )
+            if cursor.rowcount:
+                new_articles.append(article)
+    return new_articles
+
+# Main function for incremental runs: only articles no earlier run has seen
+def scrape_new_articles(config, conn, deadline=SWEEP_DEADLINE, parse_pool=None, sink=None):
+    """Returns {website: new articles} (counts with a sink, which gets them as each website finishes)."""
+    states = {row['site']: dict(row) for row in conn.execute('SELECT * FROM sources')}
+    lock = threading.Lock()  # One thread at a time records into the seen-set (and the sink)
+    recording = {'open': True}  # Closed at the deadline, so late sites aren't marked seen but never emitted
+
+    def scrape(session, site, site_config, deadline_at):
+        result = scrape_site_incremental(session, site, site_config, deadline_at, states.get(site), parse_pool)
+        if result is None:
+            return None
+        articles, state, size = result
+        with lock:
+            if not recording['open']:
+                return None
+            with conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?, ?)',
+                    (site, state['feed_url'], state['etag'], state['last_modified'], state['checked_at']),
+                )
+            new = mark_seen(conn, site, articles)
+            if sink is not None:
+                sink.write(site, new)
+        return (new if sink is None else len(new)), size
+
+    results = run_sweep(config['sources'], scrape, deadline)
+    with lock:
+        recording['open'] = False
+    new_articles = {site: new for site, (new, size) in sorted(results.items()) if new}  # Website -> its new articles
+    total = sum(new if isinstance(new, int) else len(new) for new in new_articles.values())
+    received = sum(size for new, size in results.values())
+    print(f"{total} new article(s) from {len(new_articles)} source(s); received {received / 1024:.1f} KB")
+    return new_articles
+
+class JsonlSink:
+    """Appends one compact JSON line per article to a file as each source is parsed.
+
+    Safe to share between the fetch threads. Lines are flushed as they are
+    written, so a tailer sees them right away, and fsynced at most every
+    FSYNC_INTERVAL seconds. Past ROTATE_BYTES the file is renamed to .1 (the
+    older ones to .2, .3, ...) and a new one started. Each line carries the
+    run it came from, so one run's articles can be exported (export_json).
+    """
+
+    def __init__(self, path, fsync_interval=FSYNC_INTERVAL, rotate_bytes=ROTATE_BYTES, keep=ROTATE_KEEP):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.rotate_bytes = rotate_bytes
+        self.keep = keep
+        self.run = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        self.lines = 0
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8')
+        self._last_fsync = time.monotonic()
+
+    def write(self, source, articles):
+        scraped_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        lines = ''.join(
+            json.dumps({'run': self.run, 'source': source, 'scraped_at': scraped_at, **article}, ensure_ascii=False, separators=(',', ':')) + '\n'
+            for article in articles
+        )
+        with self._lock:
+            if self._file is None:  # Closed: the site finished after the sweep's deadline
+                return
+            self._file.write(lines)
+            self._file.flush()
+            self.lines += len(articles)
+            if time.monotonic() - self._last_fsync >= self.fsync_interval:
+                os.fsync(self._file.fileno())
+                self._last_fsync = time.monotonic()
+            if self._file.tell() >= self.rotate_bytes:
+                self._rotate()
+
+    def _rotate(self):
+        os.fsync(self._file.fileno())
+        self._file.close()
+        for number in range(self.keep - 1, 0, -1):
+            if os.path.exists(f'{self.path}.{number}'):
+                os.replace(f'{self.path}.{number}', f'{self.path}.{number + 1}')
+        os.replace(self.path, f'{self.path}.1')
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def files(self):
+        """Returns the sink's files, oldest first."""
+        rotated = [f'{self.path}.{number}' for number in range(self.keep, 0, -1)]
+        return [path for path in rotated + [self.path] if os.path.exists(path)]
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+        print(f"Wrote {self.lines} article(s) to {self.path}")
+
+# Function to rebuild one run's {website: articles} from the JSONL sink, for the old JSON format
+def export_json(sink, filename):
+    data = {}
+    for path in sink.files():
+        with open(path, 'r', encoding='utf-8') as file:
+            for line in file:
+                record = json.loads(line)
+                if record['run'] == sink.run:
+                    data.setdefault(record['source'], []).append({'title': record['title'], 'link': record['link']})
+    save_to_json(dict(sorted(data.items())), filename)
 
 # Function to save the scraped data into a JSON file
 def save_to_json(data, filename='scraped_news.json'):
@@ -83,10 +540,31 @@ def save_to_json(data, filename='scraped_news.json'):
 
 # Main entry point for the script
 def main():
+    parser = argparse.ArgumentParser(description='Scrape security news headlines.')
+    parser.add_argument('--incremental', action='store_true', help=f'only emit articles not seen before (to {NEW_ARTICLES_FILE}), reading feeds where sites have them')
+    parser.add_argument('--parser', choices=('bs4', 'lxml'), default=PARSER_BACKEND, help='extraction backend; lxml is faster but can read broken markup differently (default: %(default)s)')
+    parser.add_argument('--export-json', action='store_true', help=f'also write the run as one JSON file ({JSON_FILE}, or {NEW_ARTICLES_JSON} with --incremental)')
+    args = parser.parse_args()
     config = load_config()  # Load the config file with website details
-    if config:  # Proceed only if the configuration was successfully loaded
-        scraped_data = scrape_news(config)  # Scrape the news articles
-        save_to_json(scraped_data)  # Save the scraped articles to a JSON file
+    if not config:  # Proceed only if the configuration was successfully loaded
+        return
+    use_backend(args.parser)
+    parse_pool = start_parse_pool()  # Parse pages in other processes while fetches continue
+    sink = JsonlSink(NEW_ARTICLES_FILE if args.incremental else JSONL_FILE)  # Articles are appended as each site is parsed
+    try:
+        if args.incremental:
+            conn = open_seen_db()
+            try:
+                scrape_new_articles(config, conn, parse_pool=parse_pool, sink=sink)  # Check every source for new articles
+            finally:
+                conn.close()
+        else:
+            scrape_news(config, parse_pool=parse_pool, sink=sink)  # Scrape the news articles
+    finally:
+        sink.close()
+        parse_pool.shutdown(cancel_futures=True)
+    if args.export_json:
+        export_json(sink, NEW_ARTICLES_JSON if args.incremental else JSON_FILE)  # The old one-file format
 
 # Run the main function if this script is executed directly
 if __name__ == "__main__":
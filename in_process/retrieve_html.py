@@ -25,28 +25,110 @@
 
 import requests
 import os
+import gzip
+import hashlib
+import sqlite3
+from datetime import datetime, timezone
 
-# Create the directory if it doesn't exist
-os.makedirs('./dump', exist_ok=True)
+# Snapshots are stored once per distinct page content, gzip-compressed and
+# named by SHA-256; the index records each new version of every URL and when
+# it was last seen, so an unchanged capture writes nothing but that time
+SNAPSHOT_DIR = './dump'
+OBJECT_DIR = os.path.join(SNAPSHOT_DIR, 'objects')
+INDEX_FILE = os.path.join(SNAPSHOT_DIR, 'snapshots.sqlite3')
 
-# Function to fetch HTML content from a URL
-def fetch_html(url):
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    url TEXT,
+    fetched_at TEXT,
+    sha256 TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    status INTEGER,
+    size INTEGER,
+    last_seen TEXT  -- Last capture that found this version (NULL in rows from before it was kept)
+);
+CREATE INDEX IF NOT EXISTS snapshots_by_url ON snapshots (url, fetched_at);
+"""
+
+# Function to open the snapshot index, creating the store if it doesn't exist
+def open_store():
+    os.makedirs(OBJECT_DIR, exist_ok=True)
+    conn = sqlite3.connect(INDEX_FILE)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    columns = [row['name'] for row in conn.execute('PRAGMA table_info(snapshots)')]
+    if 'last_seen' not in columns:  # Index created before unchanged captures stopped adding rows
+        conn.execute('ALTER TABLE snapshots ADD COLUMN last_seen TEXT')
+    return conn
+
+# Function to find where the snapshot with a given hash is kept
+def object_path(sha256):
+    return os.path.join(OBJECT_DIR, sha256[:2], sha256 + '.html.gz')
+
+# Function to get the most recent capture of a URL from the index
+def latest_snapshot(conn, url):
+    return conn.execute(
+        'SELECT rowid, * FROM snapshots WHERE url = ? ORDER BY fetched_at DESC LIMIT 1', (url,)
+    ).fetchone()
+
+# Function to read a stored snapshot back as text
+def read_snapshot(sha256):
+    with gzip.open(object_path(sha256), 'rt', encoding='utf-8', errors='replace') as file:
+        return file.read()
+
+# Function to store page content once under its hash; returns the hash
+def store_snapshot(content):
+    sha256 = hashlib.sha256(content).hexdigest()
+    path = object_path(sha256)
+    if not os.path.exists(path):  # Content seen before costs nothing to store again
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with gzip.open(tmp_path, 'wb', compresslevel=9) as file:
+            file.write(content)
+        os.replace(tmp_path, path)  # Never leave a half-written snapshot
+    return sha256
+
+# Function to fetch HTML content from a URL, keeping a snapshot of each new version
+def fetch_html(url, conn):
+    previous = latest_snapshot(conn, url)
+    headers = {}
+    if previous and previous['etag']:
+        headers['If-None-Match'] = previous['etag']
+    if previous and previous['last_modified']:
+        headers['If-Modified-Since'] = previous['last_modified']
     try:
-        # Make an HTTP GET request to the given URL
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()  # Raise an error if the request failed
-        
-        # Save the HTML to a file in the ./dump directory
-        filename = os.path.join('./dump', url.split('//')[1].replace('/', '_') + ".html")
-        with open(filename, 'w') as file:
-            file.write(response.text)
-        
-        print(f"Saved HTML for {url} to {filename}")
-        return response.text
+        # Make a conditional HTTP GET request, so an unchanged page is a 304 with no body
+        response = requests.get(url, headers=headers, timeout=10)
+        if response.status_code != 304:
+            response.raise_for_status()  # Raise an error if the request failed
     except requests.RequestException as e:
         print(f"Error fetching {url}: {e}")
         return None
 
+    fetched_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    etag = response.headers.get('etag') or (previous['etag'] if previous else None)
+    last_modified = response.headers.get('last-modified') or (previous['last_modified'] if previous else None)
+    if response.status_code == 304:
+        sha256 = previous['sha256']
+    else:
+        sha256 = store_snapshot(response.content)
+    with conn:
+        if previous is not None and previous['sha256'] == sha256:
+            # Same version as the latest capture: only note that it was seen again
+            print(f"Unchanged: {url}")
+            conn.execute(
+                'UPDATE snapshots SET last_seen = ?, etag = ?, last_modified = ? WHERE rowid = ?',
+                (fetched_at, etag, last_modified, previous['rowid']),
+            )
+        else:
+            print(f"Saved new snapshot of {url} ({sha256[:12]})")
+            conn.execute(
+                'INSERT INTO snapshots VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (url, fetched_at, sha256, etag, last_modified, response.status_code, len(response.content), fetched_at),
+            )
+    return response.text if response.status_code != 304 else read_snapshot(sha256)
+
 # Example use case
 urls = [
     "https://krebsonsecurity.com/",
@@ -71,5 +153,10 @@ urls = [
     # Add more URLs from your config if necessary
 ]
 
-for url in urls:
-    fetch_html(url)
+if __name__ == "__main__":
+    conn = open_store()
+    try:
+        for url in urls:
+            fetch_html(url, conn)
+    finally:
+        conn.close()
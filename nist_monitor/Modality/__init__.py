@@ -0,0 +1,7 @@
+"""NIST SP publication downloader.
+
+Run it with `python -m Modality` (see __main__.py). Importing the package or
+any of its modules has no side effects: the download directory and logging
+are set up when a run starts, and openpyxl, bs4 and tqdm are only imported
+by the code paths that need them.
+"""
@@ -0,0 +1,105 @@
+import sys
+import logging
+import argparse
+from .config import ENGINE
+
+ENGINES = ("async", "threads")
+
+def dry_run():
+    """Crawls the catalogue and lists each entry as new or known; downloads nothing.
+
+    Nothing is written: the download directory isn't created and the
+    manifest is only read when an earlier run left one.
+    """
+    import os
+    from concurrent.futures import ThreadPoolExecutor
+    from .config import SP_PAGE_URL, MANIFEST_FILE, CRAWL_ALL_PAGES, CATALOGUE_CONCURRENCY, MAX_CATALOGUE_PAGES
+    from .data_extraction import create_client, fetch_page, extract_intermediate_links
+    from .catalogue import CatalogueCrawl
+    from .manifest import Manifest
+
+    with create_client() as client:
+        html = fetch_page(client, SP_PAGE_URL)
+        if not html:
+            logging.error("Failed to fetch main page. Exiting.")
+            return 1
+        crawl = CatalogueCrawl(
+            SP_PAGE_URL, extract_intermediate_links, CATALOGUE_CONCURRENCY,
+            max_pages=MAX_CATALOGUE_PAGES if CRAWL_ALL_PAGES else 1,
+        )
+        crawl.add_page(html, first=True)
+        with ThreadPoolExecutor(CATALOGUE_CONCURRENCY) as executor:
+            while wave := crawl.next_wave():
+                for page_html in executor.map(lambda url: fetch_page(client, url), wave):
+                    if page_html:  # fetch_page logs the pages it couldn't get
+                        crawl.add_page(page_html)
+
+    manifest = Manifest(MANIFEST_FILE) if os.path.exists(MANIFEST_FILE) else None
+    new = 0
+    try:
+        for title, intermediate_url in crawl.entries.items():
+            known = manifest is not None and manifest.get(intermediate_url) is not None
+            new += not known
+            print(f"{'known' if known else 'new':5}  {title}  {intermediate_url}")
+    finally:
+        if manifest is not None:
+            manifest.close()
+    print(f"{crawl.describe()}: {new} new, {len(crawl.entries) - new} known")
+    return 0
+
+def main(argv=None):
+    """Command-line entry point: python -m Modality [--sync] [--engine ...]"""
+    parser = argparse.ArgumentParser(prog="python -m Modality", description="Download NIST SP publications.")
+    parser.add_argument("--sync", action="store_true", help="only download new or changed publications")
+    parser.add_argument("--engine", choices=ENGINES, default=ENGINE, help=f"download engine (default: {ENGINE})")
+    parser.add_argument("--dry-run", action="store_true", help="list the catalogue as new/known entries without downloading")
+    parser.add_argument("--plan", action="store_true", help="resolve the catalogue and HEAD every PDF to count new, changed and unchanged documents and bytes; the next run reuses the resolved pages")
+    parser.add_argument("--json", action="store_true", help="with --plan, print the plan as JSON")
+    parser.add_argument("--export-excel", action="store_true", help="rebuild the Excel log from the ledger and exit")
+    args = parser.parse_args(argv)
+
+    if args.dry_run:
+        # Console only; a dry run leaves the download directory alone
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+        return dry_run()
+
+    from .logging_utils import setup_download_dir, setup_logging
+    setup_download_dir()
+    setup_logging()
+    if args.plan:
+        import json
+        import asyncio
+        from .async_downloader import async_plan
+        run_plan = asyncio.run(async_plan())
+        if run_plan is None:
+            return 1
+        print(json.dumps(run_plan.to_json(), indent=2, ensure_ascii=False) if args.json else run_plan.describe())
+        return 0
+    if args.export_excel:
+        import os
+        from .config import LEDGER_FILE, EXCEL_FILE
+        from .ledger import export_excel, import_excel
+        if not os.path.exists(LEDGER_FILE):
+            if not os.path.exists(EXCEL_FILE):
+                logging.error(f"No download ledger at {LEDGER_FILE}; run a download first.")
+                return 1
+            import_excel(EXCEL_FILE, LEDGER_FILE)  # The migration open_ledger does on first use
+        export_excel(LEDGER_FILE, EXCEL_FILE)
+        return 0
+    try:
+        # Only the chosen engine (and its dependencies) is imported
+        if args.engine == "async":
+            import asyncio
+            from .async_downloader import async_download_all_pdfs
+            asyncio.run(async_download_all_pdfs(sync=args.sync))
+        else:
+            from .downloader import download_all_pdfs
+            download_all_pdfs(sync=args.sync)
+    except KeyboardInterrupt:
+        logging.error("Script interrupted by user.")
+        print("\nDownload interrupted. Exiting gracefully.")
+        return 130
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,485 @@
+import os
+import asyncio
+import hashlib
+import httpx
+import logging
+import time
+import random
+
+from .config import (
+    LIMIT_DOWNLOADS, BASE_URL, SP_PAGE_URL, DOWNLOAD_DIR, EXCEL_FILE, LEDGER_FILE, MANIFEST_FILE,
+    SEARCH_INDEX_FILE, UPDATE_SEARCH_INDEX, METRICS_TEXTFILE, RUN_SUMMARY_DIR,
+    DOWNLOAD_TIMEOUT, CHUNK_SIZE,
+    SEGMENTED_DOWNLOADS, SEGMENT_THRESHOLD, MAX_SEGMENTS, RESOLVE_WORKERS, DOWNLOAD_WORKERS, QUEUE_SIZE,
+    CRAWL_ALL_PAGES, CATALOGUE_CONCURRENCY, MAX_CATALOGUE_PAGES, ANALYZE_PDFS, PDF_WORKERS,
+    GOVERNOR_INITIAL, GOVERNOR_MIN, GOVERNOR_MAX, RETRY_BUDGET, PLAN_FILE, PLAN_MAX_AGE,
+)
+from .logging_utils import setup_download_dir
+from . import html_extract
+from . import resume
+from . import segmented
+from .manifest import Manifest
+from .ledger import open_ledger, export_excel
+from .governor import AsyncGovernor
+from .store import canonical_url
+from .catalogue import CatalogueCrawl
+from .search_index import SearchIndex, update_index
+from . import pdf_text
+from .plan import RunPlan, classify, plan_entry, reuse_plan
+# Shared with the thread engine: the page cache, request policy, metrics and store
+from .data_extraction import page_cache, request_policy, metrics, content_store, client_options
+
+# The async engine's own governor; its slots are awaited instead of blocking
+governor = AsyncGovernor(GOVERNOR_INITIAL, GOVERNOR_MIN, GOVERNOR_MAX)
+
+def create_client():
+    """Creates the shared HTTP/2 client with keep-alive pools per NIST host."""
+    return httpx.AsyncClient(**client_options(httpx.AsyncHTTPTransport))
+
+async def fetch_page(client, url):
+    """Fetches HTML content asynchronously."""
+    async def attempt():
+        response = await client.get(url, extensions={"trace": metrics.atrace})
+        metrics.response("catalogue_fetch", response.status_code)
+        response.raise_for_status()
+        timing.bytes = len(response.content)
+        return response.text
+
+    try:
+        with metrics.timed("catalogue_fetch") as timing:
+            return await request_policy.run_async(url, attempt)
+    except Exception as e:
+        logging.error(f"Error fetching {url}: {e}")
+        return None
+
+def extract_intermediate_links(html):
+    """Extracts intermediate links to SP-series pages."""
+    with metrics.timed("catalogue_parse") as timing:
+        timing.bytes = len(html)
+        return html_extract.extract_intermediate_links(html, BASE_URL)
+
+async def fetch_page_info(client, url):
+    """Returns the parsed intermediate page, fetching it at most once per run."""
+    info = page_cache.get(url)
+    if info:
+        metrics.increment("page_cache_hits")
+        return info
+    async def attempt():
+        # The slot is taken per attempt so backoff sleeps don't hold it
+        with metrics.timed("page_fetch") as timing:
+            async with governor.slot(url) as slot:
+                response = await client.get(url, headers=page_cache.conditional_headers(url), extensions={"trace": metrics.atrace})
+                slot.response_started(response)
+                metrics.response("page_fetch", response.status_code)
+                slot.bytes = timing.bytes = len(response.content)
+                if response.status_code != 304:
+                    response.raise_for_status()
+        return page_cache.update(url, response.status_code, response.headers, response.text)
+
+    try:
+        return await request_policy.run_async(url, attempt)
+    except Exception as e:
+        logging.error(f"Error fetching {url}: {e}")
+        return None
+
+async def extract_pdf_link(client, intermediate_page_url):
+    """Extracts the PDF link from an intermediate page."""
+    with metrics.timed("pdf_link"):
+        info = await fetch_page_info(client, intermediate_page_url)
+    return info["pdf_url"] if info else None
+
+async def fetch_summary(client, intermediate_page_url):
+    """Fetches a summary asynchronously."""
+    with metrics.timed("summary"):
+        info = await fetch_page_info(client, intermediate_page_url)
+    return info["summary"] if info else "N/A"
+
+async def _download_attempt(client, title, pdf_url, intermediate_url, file_path, manifest, sync):
+    """Makes one download attempt; returns the file size, or None if unchanged.
+
+    A partial left by an earlier attempt or run is resumed.
+    """
+    state = resume.load_state(file_path, pdf_url)
+    headers = resume.resume_headers(state)
+    if sync and not headers:
+        headers = manifest.conditional_headers(intermediate_url, pdf_url)
+    # Stream to <title>.pdf.part in fixed-size chunks, then rename into place
+    async with governor.slot(pdf_url) as slot, client.stream("GET", pdf_url, headers=headers, timeout=httpx.Timeout(DOWNLOAD_TIMEOUT, pool=None), extensions={"trace": metrics.atrace}) as response:
+        slot.response_started(response)
+        metrics.response("download", response.status_code)
+        metrics.observe("download_ttfb", slot.latency)
+        if response.status_code == 304:
+            manifest.touch(intermediate_url)
+            return None
+        if response.status_code == 416:
+            resume.discard(file_path)  # Stale partial, the retry starts from zero
+        response.raise_for_status()
+        offset = resume.start_offset(response, state)
+        ranges = segmented.plan(response, offset, SEGMENT_THRESHOLD, MAX_SEGMENTS) if SEGMENTED_DOWNLOADS else None
+        with metrics.timed("download_transfer") as timing:
+            if ranges:
+                logging.info(f"Fetching {title} in {len(ranges)} segments")
+                size_bytes, digest = await _download_segments(response, pdf_url, file_path, ranges, slot)
+            else:
+                sha256 = hashlib.sha256()
+                if offset:
+                    logging.info(f"Resuming {title} from byte {offset}")
+                    resume.hash_partial(file_path, sha256)
+                resume.save_state(file_path, pdf_url, response)
+                size_bytes = offset
+                with open(resume.part_path(file_path), "ab" if offset else "wb") as file:
+                    async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                        file.write(chunk)
+                        sha256.update(chunk)
+                        size_bytes += len(chunk)
+                        slot.bytes += len(chunk)
+                digest = sha256.hexdigest()
+            timing.bytes = size_bytes - offset
+    # Store by content; {title}.pdf becomes a link to the stored object
+    if content_store.commit(resume.part_path(file_path), digest, file_path):
+        metrics.increment("deduplicated", kind="content")
+        logging.info(f"{title} is identical to a stored PDF; linked instead of storing a second copy")
+    resume.discard_state(file_path)
+    manifest.record(
+        intermediate_url, title, pdf_url, file_path,
+        response.headers.get("etag"), response.headers.get("last-modified"),
+        size_bytes, digest,
+    )
+    return size_bytes
+
+async def _download_segments(response, pdf_url, file_path, ranges, slot):
+    """Fetches a PDF as parallel byte ranges into a preallocated .part file.
+
+    The open response supplies the first range; the others go over separate
+    HTTP/1.1 connections, since HTTP/2 would multiplex them onto one.
+    Returns (size, sha256) after checking the assembled file.
+    """
+    validator = segmented.validator(response)
+    etag = response.headers.get("etag")
+    size = ranges[-1][1] + 1
+    part = resume.part_path(file_path)
+    resume.discard_state(file_path)  # A preallocated .part must not look resumable
+
+    async def fetch(stream, start, end):
+        position = start
+        async for chunk in stream.aiter_bytes(CHUNK_SIZE):
+            written = segmented.write_chunk(fd, chunk, position, end)
+            position += written
+            slot.bytes += written
+            if position > end:
+                break
+        segmented.check_complete(start, end, position)
+
+    async def fetch_range(segment_client, start, end):
+        headers = segmented.range_headers(start, end, validator)
+        async with segment_client.stream("GET", pdf_url, headers=headers, extensions={"trace": metrics.atrace}) as part_response:
+            metrics.response("download_segment", part_response.status_code)
+            part_response.raise_for_status()
+            segmented.check_segment(part_response, start, end, etag)
+            await fetch(part_response, start, end)
+
+    fd = segmented.preallocate(part, size)
+    try:
+        async with httpx.AsyncClient(timeout=DOWNLOAD_TIMEOUT, follow_redirects=True) as segment_client:
+            # return_exceptions so no segment is still writing when fd is closed
+            results = await asyncio.gather(
+                fetch(response, *ranges[0]),
+                *(fetch_range(segment_client, start, end) for start, end in ranges[1:]),
+                return_exceptions=True,
+            )
+    finally:
+        os.close(fd)
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+    return size, segmented.verify(part, size)
+
+async def _link_duplicate(client, title, pdf_url, intermediate_url, manifest, source_url, sync=False):
+    """Links title to the PDF already downloaded for source_url; returns its log row.
+
+    Like async_download_pdf, returns None in sync mode if the link was already
+    current. Returns False when there is nothing to link to.
+    """
+    entry = manifest.get(source_url) if source_url else None
+    if not entry or not content_store.has(entry["sha256"]):
+        return False
+    file_path = os.path.join(DOWNLOAD_DIR, f"{title}.pdf")
+    current = manifest.get(intermediate_url)
+    if sync and current and current["sha256"] == entry["sha256"] and os.path.exists(file_path):
+        manifest.touch(intermediate_url)
+        return None
+    content_store.link(entry["sha256"], file_path)
+    manifest.record(
+        intermediate_url, title, pdf_url, file_path,
+        entry["etag"], entry["last_modified"], entry["size"], entry["sha256"],
+    )
+    metrics.increment("deduplicated", kind="url")
+    logging.info(f"{title} points at the same PDF as {entry['title']}; linked instead of downloading it again")
+    summary = await fetch_summary(client, intermediate_url)
+    return (title, "Linked", entry["size"] / (1024 * 1024), 0.0, summary)
+
+async def async_download_pdf(client, title, pdf_url, intermediate_url, manifest, sync=False):
+    """Downloads a PDF asynchronously and returns its log row.
+
+    Failed attempts are retried under the request policy, each resuming from
+    the bytes already on disk. In sync mode a document whose manifest entry
+    is still current is skipped and None is returned.
+    """
+    file_path = os.path.join(DOWNLOAD_DIR, f"{title}.pdf")
+    start_time = time.time()
+    summary = await fetch_summary(client, intermediate_url)
+
+    try:
+        with metrics.timed("download") as timing:
+            size_bytes = await request_policy.run_async(
+                pdf_url,
+                lambda: _download_attempt(client, title, pdf_url, intermediate_url, file_path, manifest, sync),
+                retry_statuses={416},
+            )
+            timing.bytes = size_bytes or 0
+        if size_bytes is None:
+            metrics.increment("documents", status="Unchanged")
+            logging.info(f"Unchanged: {title}")
+            return None
+        size_mb = size_bytes / (1024 * 1024)  # Convert to MB
+        time_taken = time.time() - start_time
+        metrics.increment("documents", status="Success")
+        logging.info(f"Downloaded: {file_path} ({size_mb:.2f} MB in {time_taken:.2f}s)")
+        return (title, "Success", size_mb, time_taken, summary)
+
+    except Exception as e:
+        # The .part file and its sidecar are kept so the next run can resume
+        time_taken = time.time() - start_time
+        size_mb = resume.partial_size(file_path) / (1024 * 1024)
+        metrics.increment("documents", status="Failed")
+        logging.error(f"Failed to download {title}: {e}")
+        return (title, "Failed", size_mb, time_taken, summary)
+
+# Pipeline
+_DONE = object()  # End-of-stream marker passed between stages
+
+async def _run_stage(inbox, handler, workers, outbox=None, downstream_workers=0):
+    """Runs `workers` consumers of inbox, feeding non-None results to outbox."""
+    async def worker():
+        while (item := await inbox.get()) is not _DONE:
+            try:
+                result = await handler(*item)
+            except Exception as e:
+                logging.error(f"Pipeline stage {handler.__name__} failed on {item[0]}: {e}")
+                continue
+            if outbox is not None and result is not None:
+                await outbox.put(result)
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    for _ in range(downstream_workers):
+        await outbox.put(_DONE)
+
+async def async_download_all_pdfs(sync=False):
+    """Main function to orchestrate downloads; sync=True skips unchanged documents."""
+    setup_download_dir()
+    logging.info(f"Starting async {'sync' if sync else 'download'} process...")
+    metrics.reset()
+    governor.reset()
+    request_policy.reset()
+    reuse_plan(page_cache, PLAN_FILE, PLAN_MAX_AGE)
+    # Started before the ledger's writer thread exists; see pdf_text.start_pool
+    pool = pdf_text.start_pool(PDF_WORKERS) if ANALYZE_PDFS else None
+    manifest = Manifest(MANIFEST_FILE)
+    ledger = open_ledger(LEDGER_FILE, EXCEL_FILE)
+    try:
+        async with create_client() as client:
+            await _download_catalogue(client, manifest, ledger, pool, sync)
+        if UPDATE_SEARCH_INDEX:
+            with metrics.timed("search_index"):
+                # PDFs the pipeline didn't analyze
+                await asyncio.to_thread(update_index, SEARCH_INDEX_FILE, manifest, pool)
+    finally:
+        if pool:
+            pool.shutdown()
+        manifest.close()
+        ledger.close()
+        # Rebuilt once per run instead of once per row
+        export_excel(LEDGER_FILE, EXCEL_FILE)
+        metrics.export(METRICS_TEXTFILE, RUN_SUMMARY_DIR)
+
+async def _feed_catalogue(client, html, resolve_queue, manifest, sync, sample=True):
+    """Queues the catalogue's entries for the pipeline as its pages arrive.
+
+    The pages after the first are fetched CATALOGUE_CONCURRENCY at a time.
+    In sync mode the crawl stops at a page of already known entries. With
+    sample=False LIMIT_DOWNLOADS is ignored and the whole catalogue is queued.
+    """
+    if sample and LIMIT_DOWNLOADS:
+        intermediate_links = extract_intermediate_links(html)
+        all_titles = list(intermediate_links.keys())
+        selected_titles = random.sample(all_titles, min(5, len(all_titles)))  # From the first catalogue page
+        logging.info(f"LIMIT_DOWNLOADS is True. Only these documents will be downloaded: {', '.join(selected_titles)}")
+        for title in selected_titles:
+            await resolve_queue.put((title, intermediate_links[title]))
+        return
+
+    crawl = CatalogueCrawl(
+        SP_PAGE_URL, extract_intermediate_links, CATALOGUE_CONCURRENCY,
+        is_known=(lambda url: manifest.get(url) is not None) if sync else None,
+        max_pages=MAX_CATALOGUE_PAGES if CRAWL_ALL_PAGES else 1,
+    )
+
+    async def queue_entries(entries):
+        for title, intermediate_url in entries.items():
+            await resolve_queue.put((title, intermediate_url))
+
+    await queue_entries(crawl.add_page(html, first=True))
+    metrics.increment("catalogue_pages")
+    while wave := crawl.next_wave():
+        for page in asyncio.as_completed([fetch_page(client, url) for url in wave]):
+            page_html = await page
+            if page_html:  # fetch_page logs the pages it couldn't get
+                await queue_entries(crawl.add_page(page_html))
+                metrics.increment("catalogue_pages")
+    logging.info(f"Catalogue: {crawl.describe()}")
+
+async def _download_catalogue(client, manifest, ledger, pool, sync):
+    """Resolves and downloads the SP catalogue using one pooled client."""
+    html = await fetch_page(client, SP_PAGE_URL)
+    if not html:
+        logging.error("Failed to fetch main page. Exiting.")
+        return
+
+    resolve_queue = asyncio.Queue(QUEUE_SIZE)
+    download_queue = asyncio.Queue(QUEUE_SIZE)
+    # Unbounded, so slow PDF parsing never holds up the downloads
+    analyze_queue = asyncio.Queue()
+    record_queue = asyncio.Queue(QUEUE_SIZE)
+    index = SearchIndex(SEARCH_INDEX_FILE) if pool and UPDATE_SEARCH_INDEX else None
+
+    async def resolve(title, intermediate_url):
+        pdf_url = await extract_pdf_link(client, intermediate_url)
+        if not pdf_url:
+            logging.warning(f"No PDF link found for {title} ({intermediate_url})")
+            return None
+        return (title, pdf_url, intermediate_url)
+
+    # Canonical PDF URL -> future of the intermediate URL whose download got
+    # it (None if that failed), so entries sharing a PDF fetch it only once
+    claims = {}
+
+    async def download(title, pdf_url, intermediate_url):
+        key = canonical_url(pdf_url)
+        claim = claims.get(key)
+        row = None
+        if claim is None:
+            claims[key] = claim = asyncio.get_running_loop().create_future()
+            try:
+                row = await async_download_pdf(client, title, pdf_url, intermediate_url, manifest, sync)
+            except BaseException:
+                claim.set_result(None)
+                raise
+            claim.set_result(intermediate_url if row is None or row[1] == "Success" else None)
+        else:
+            row = await _link_duplicate(client, title, pdf_url, intermediate_url, manifest, await claim, sync)
+            if row is False:
+                row = await async_download_pdf(client, title, pdf_url, intermediate_url, manifest, sync)
+        return (row, intermediate_url) if row else None
+
+    async def analyze(row, intermediate_url):
+        # CPU-bound PDF parsing runs in the process pool, off the event loop
+        entry = manifest.get(intermediate_url)
+        if pool is None or row[1] not in ("Success", "Linked") or not entry:
+            return (row, None, None)
+        result = await asyncio.get_running_loop().run_in_executor(pool, pdf_text.analyze, entry["file_path"])
+        metrics.observe("pdf_analyze", result["seconds"], entry["size"])
+        if result["error"]:
+            logging.warning(f"Could not extract text from {row[0]}: {result['error']}")
+        if result["summary"]:
+            row = row[:4] + (result["summary"],)  # Replaces the page's meta description
+        return (row, entry["sha256"], result)
+
+    async def record(row, sha256, result):
+        ledger.record(*row)
+        if index is not None and result is not None:
+            index.add(sha256, result["pages"], result["error"])
+
+    stages = asyncio.gather(
+        _run_stage(resolve_queue, resolve, RESOLVE_WORKERS, download_queue, DOWNLOAD_WORKERS),
+        _run_stage(download_queue, download, DOWNLOAD_WORKERS, analyze_queue, PDF_WORKERS),
+        _run_stage(analyze_queue, analyze, PDF_WORKERS, record_queue, 1),
+        _run_stage(record_queue, record, 1),
+    )
+    try:
+        await _feed_catalogue(client, html, resolve_queue, manifest, sync)
+    finally:
+        for _ in range(RESOLVE_WORKERS):
+            await resolve_queue.put(_DONE)
+
+    try:
+        await stages
+    finally:
+        if index is not None:
+            index.close()
+    logging.info(f"Concurrency governor: {governor.describe()}")
+    logging.info(f"Retries used: {request_policy.retries}/{RETRY_BUDGET}")
+    logging.info("All downloads complete.")
+
+async def _plan_document(client, title, intermediate_url, manifest):
+    """Resolves one catalogue entry and HEADs its PDF; returns its plan entry."""
+    info = await fetch_page_info(client, intermediate_url)
+    pdf_url = info["pdf_url"] if info else None
+    if not pdf_url:
+        logging.warning(f"No PDF link found for {title} ({intermediate_url})")
+        return plan_entry(title, intermediate_url, "unresolved", page=info)
+
+    async def attempt():
+        async with governor.slot(pdf_url) as slot:
+            response = await client.head(pdf_url, extensions={"trace": metrics.atrace})
+            slot.response_started(response)
+            metrics.response("plan_head", response.status_code)
+            response.raise_for_status()
+            return response.headers
+
+    try:
+        with metrics.timed("plan_head"):
+            headers = await request_policy.run_async(pdf_url, attempt)
+    except Exception as e:
+        logging.error(f"HEAD {pdf_url} failed: {e}")
+        return plan_entry(title, intermediate_url, "failed", pdf_url, page=info)
+    status, size = classify(manifest.get(intermediate_url), pdf_url, headers)
+    return plan_entry(title, intermediate_url, status, pdf_url, size, info)
+
+async def async_plan():
+    """Computes the work set of a run without downloading: returns a RunPlan, or None.
+
+    The whole catalogue is crawled and resolved, and each PDF gets a HEAD
+    request instead of a GET. The plan is saved to PLAN_FILE, where the
+    next run picks up the resolved pages (see plan.reuse_plan).
+    """
+    setup_download_dir()
+    logging.info("Planning: resolving the catalogue without downloading...")
+    metrics.reset()
+    governor.reset()
+    request_policy.reset()
+    manifest = Manifest(MANIFEST_FILE)
+    entries = []
+
+    async def check(title, intermediate_url):
+        entries.append(await _plan_document(client, title, intermediate_url, manifest))
+
+    try:
+        async with create_client() as client:
+            html = await fetch_page(client, SP_PAGE_URL)
+            if not html:
+                logging.error("Failed to fetch main page. Exiting.")
+                return None
+            resolve_queue = asyncio.Queue(QUEUE_SIZE)
+            stage = asyncio.gather(_run_stage(resolve_queue, check, RESOLVE_WORKERS))
+            try:
+                await _feed_catalogue(client, html, resolve_queue, manifest, sync=False, sample=False)
+            finally:
+                for _ in range(RESOLVE_WORKERS):
+                    await resolve_queue.put(_DONE)
+            await stage
+    finally:
+        manifest.close()
+    run_plan = RunPlan(entries)
+    run_plan.save(PLAN_FILE)
+    logging.info(f"Plan saved to {PLAN_FILE}")
+    return run_plan
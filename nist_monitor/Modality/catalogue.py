@@ -0,0 +1,54 @@
+import logging
+from . import html_extract
+
+class CatalogueCrawl:
+    """State of one crawl over the paginated SP listing.
+
+    The engine fetches the first page, then the page URLs `next_wave` hands
+    out (concurrently), and passes each page's HTML to `add_page`, which
+    returns the entries not seen on earlier pages so they can go straight
+    into the download pipeline.
+
+    The listing is newest first, so when `is_known` is given (sync runs) the
+    crawl stops after the first wave in which a page held nothing but known
+    entries: everything after it was seen by an earlier run.
+    """
+
+    def __init__(self, listing_url, extract_links, concurrency=4, is_known=None, max_pages=None):
+        self.listing_url = listing_url
+        self.extract_links = extract_links  # html -> {title: intermediate URL}
+        self.concurrency = concurrency
+        self.is_known = is_known
+        self.max_pages = max_pages
+        self.entries = {}  # Every entry found so far, title -> intermediate URL
+        self.pages_fetched = 0
+        self.pages_total = 1
+        self.stopped_early = False
+        self._pending = []
+
+    def add_page(self, html, first=False):
+        """Takes one page's HTML and returns its entries that are new to the crawl."""
+        page_links = self.extract_links(html)
+        self.pages_fetched += 1
+        if first:
+            pages = html_extract.extract_pagination(html, self.listing_url)
+            self._pending = [pages[number] for number in sorted(pages)]
+            if self.max_pages:
+                self._pending = self._pending[:self.max_pages - 1]
+            self.pages_total = len(self._pending) + 1
+            if self._pending:
+                logging.info(f"Catalogue has {len(pages) + 1} pages; crawling {self.pages_total}")
+        if self.is_known and page_links and all(self.is_known(url) for url in page_links.values()):
+            self.stopped_early = True
+        return html_extract.merge_links(self.entries, page_links)
+
+    def next_wave(self):
+        """Returns up to `concurrency` page URLs to fetch next; empty when the crawl is done."""
+        if self.stopped_early:
+            self._pending = []
+        wave, self._pending = self._pending[:self.concurrency], self._pending[self.concurrency:]
+        return wave
+
+    def describe(self):
+        note = f", stopped early at known entries ({self.pages_total - self.pages_fetched} pages skipped)" if self.stopped_early else ""
+        return f"{len(self.entries)} documents on {self.pages_fetched} catalogue page(s){note}"
@@ -0,0 +1,63 @@
+import os
+
+# Configuration. Importing this module has no side effects; the download
+# directory is created when a run starts (logging_utils.setup_download_dir).
+ENGINE = "async"  # "async" (one event loop, HTTP/2) or "threads"
+LIMIT_DOWNLOADS = True  # Set True for only 5 random downloads, False for all
+BASE_URL = "https://csrc.nist.gov"
+SP_PAGE_URL = f"{BASE_URL}/publications/sp"
+DOWNLOAD_DIR = os.path.expanduser("~/Documents/nist_downloads_http2")
+LOG_FILE = os.path.join(DOWNLOAD_DIR, "nist_sp_download.log")
+EXCEL_FILE = os.path.join(DOWNLOAD_DIR, "download_log.xlsx")
+LEDGER_FILE = os.path.join(DOWNLOAD_DIR, "download_log.jsonl")  # Source of truth for EXCEL_FILE
+PAGE_CACHE_DIR = os.path.join(DOWNLOAD_DIR, "page_cache")  # None keeps the page cache in memory only
+STORE_DIR = os.path.join(DOWNLOAD_DIR, ".objects")  # PDFs by SHA-256; {title}.pdf files link here
+LINK_MODE = "hardlink"  # Or "symlink"
+MANIFEST_FILE = os.path.join(DOWNLOAD_DIR, "manifest.sqlite3")
+SEARCH_INDEX_FILE = os.path.join(DOWNLOAD_DIR, "search.sqlite3")  # Full-text index of the PDFs
+UPDATE_SEARCH_INDEX = True  # Index new PDFs at the end of each run (needs pypdf)
+METRICS_TEXTFILE = os.path.join(DOWNLOAD_DIR, "nist_downloads.prom")  # For node_exporter's textfile collector
+RUN_SUMMARY_DIR = os.path.join(DOWNLOAD_DIR, "runs")  # One JSON summary per run
+PLAN_FILE = os.path.join(DOWNLOAD_DIR, "plan.json")  # Written by --plan
+PLAN_MAX_AGE = 6 * 3600  # Seconds a plan's resolved pages are reused by the next run
+
+# Connection pooling (async engine: one client per run, one pool per NIST host)
+POOLED_HOSTS = ["csrc.nist.gov", "nvlpubs.nist.gov"]
+MAX_CONNECTIONS_PER_HOST = 6
+MAX_KEEPALIVE_PER_HOST = 6
+KEEPALIVE_EXPIRY = 60  # Seconds an idle connection is kept open for reuse
+PAGE_TIMEOUT = 10
+DOWNLOAD_TIMEOUT = 20
+CHUNK_SIZE = 128 * 1024  # Per-download write buffer
+
+# Segmented downloads: large PDFs are fetched as parallel byte ranges
+SEGMENTED_DOWNLOADS = True
+SEGMENT_THRESHOLD = 8 * 1024 * 1024  # Files smaller than this use a single stream
+MAX_SEGMENTS = 4  # Connections per file
+
+# Catalogue crawl: every page of the SP listing, streamed into the pipeline
+CRAWL_ALL_PAGES = True  # False only reads the first listing page
+CATALOGUE_CONCURRENCY = 4  # Listing pages fetched at once
+MAX_CATALOGUE_PAGES = None  # None for no cap
+
+# Pipeline (catalogue -> resolve -> download -> analyze -> record)
+RESOLVE_WORKERS = 8
+DOWNLOAD_WORKERS = 16  # Upper bound; the governor decides how many run at once
+QUEUE_SIZE = 16  # Max items buffered between two stages
+
+# PDF stage: text extraction and summaries in worker processes (needs pypdf)
+ANALYZE_PDFS = True
+PDF_WORKERS = os.cpu_count() or 1
+
+# Adaptive (AIMD) limit on in-flight requests per host
+GOVERNOR_INITIAL = 4
+GOVERNOR_MIN = 1
+GOVERNOR_MAX = 16
+
+# Request policy shared by every fetch: per-host rate limit and bounded retries
+RATE_PER_HOST = 10.0  # Requests per second per host
+RATE_BURST = 20
+MAX_ATTEMPTS = 4  # Tries per request, including the first
+RETRY_BASE_DELAY = 0.5  # Seconds; doubles per attempt, with full jitter
+RETRY_MAX_DELAY = 30.0  # Also caps how long a Retry-After is honoured
+RETRY_BUDGET = 50  # Retries allowed across the whole run
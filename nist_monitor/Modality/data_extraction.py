@@ -1,47 +1,112 @@
 import logging
 import httpx
-from bs4 import BeautifulSoup
-from config import BASE_URL
+from .config import (
+    BASE_URL, PAGE_CACHE_DIR, STORE_DIR, LINK_MODE, GOVERNOR_INITIAL, GOVERNOR_MIN, GOVERNOR_MAX,
+    RATE_PER_HOST, RATE_BURST, MAX_ATTEMPTS, RETRY_BASE_DELAY, RETRY_MAX_DELAY, RETRY_BUDGET,
+    POOLED_HOSTS, MAX_CONNECTIONS_PER_HOST, MAX_KEEPALIVE_PER_HOST, KEEPALIVE_EXPIRY, PAGE_TIMEOUT,
+)
+from .page_cache import PageCache
+from .governor import ThreadGovernor
+from .request_layer import RequestPolicy
+from .metrics import RunMetrics
+from .store import ContentStore
+from . import html_extract
 
-def fetch_page(url):
+# Shared by extract_pdf_link and fetch_summary so each page is fetched once
+page_cache = PageCache(PAGE_CACHE_DIR)
+# Shared with the download threads so each host's concurrency adapts as one
+governor = ThreadGovernor(GOVERNOR_INITIAL, GOVERNOR_MIN, GOVERNOR_MAX)
+# Rate limits and retries for every request, pages and downloads alike
+request_policy = RequestPolicy(RATE_PER_HOST, RATE_BURST, MAX_ATTEMPTS, RETRY_BASE_DELAY, RETRY_MAX_DELAY, RETRY_BUDGET)
+# Stage timings and counters, exported at the end of each run
+metrics = RunMetrics()
+request_policy.on_retry = metrics.record_retry
+# Both engines file downloads under their SHA-256 here
+content_store = ContentStore(STORE_DIR, LINK_MODE)
+
+def client_options(transport_class):
+    """Keyword arguments for a run's shared HTTP/2 client, with keep-alive pools per NIST host.
+
+    transport_class is httpx.HTTPTransport or httpx.AsyncHTTPTransport, so
+    both engines' clients get the same limits, pools and timeouts.
+    """
+    limits = httpx.Limits(
+        max_connections=MAX_CONNECTIONS_PER_HOST,
+        max_keepalive_connections=MAX_KEEPALIVE_PER_HOST,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+    )
+    # Each mounted transport owns its own pool, so the limits apply per host
+    # and requests to the same host are multiplexed over HTTP/2 streams.
+    mounts = {
+        f"https://{host}": transport_class(http2=True, limits=limits)
+        for host in POOLED_HOSTS
+    }
+    return {
+        "http2": True,
+        "limits": limits,
+        "mounts": mounts,
+        # No pool timeout: requests wait for a free connection/stream.
+        "timeout": httpx.Timeout(PAGE_TIMEOUT, pool=None),
+        "follow_redirects": True,
+    }
+
+def create_client():
+    """Creates the thread engine's shared client; httpx clients are thread-safe."""
+    return httpx.Client(**client_options(httpx.HTTPTransport))
+
+def fetch_page(client, url):
     """Fetches and returns the HTML content of a webpage."""
+    def attempt():
+        response = client.get(url, extensions={"trace": metrics.trace})
+        metrics.response("catalogue_fetch", response.status_code)
+        response.raise_for_status()
+        timing.bytes = len(response.content)
+        return response.text
+
     try:
-        with httpx.Client(http2=True, timeout=10) as client:
-            response = client.get(url, follow_redirects=True)
-            response.raise_for_status()
-            return response.text
+        with metrics.timed("catalogue_fetch") as timing:
+            return request_policy.run(url, attempt)
     except Exception as e:
         logging.error(f"Error fetching {url}: {e}")
         return None
 
 def extract_intermediate_links(html):
     """Extracts links to SP-series intermediate pages."""
-    soup = BeautifulSoup(html, "html.parser")
-    intermediate_links = {}
-    for a_tag in soup.find_all("a", href=True):
-        href = a_tag["href"]
-        if href.startswith("/pubs/sp/"):
-            title = a_tag.get_text(strip=True).replace("/", "_") or "SP_Document"
-            intermediate_links[title] = BASE_URL + href
-    return intermediate_links
-
-def extract_pdf_link(intermediate_page_url):
-    """Navigates to an intermediate page and extracts the PDF download link."""
-    html = fetch_page(intermediate_page_url)
-    if not html:
+    with metrics.timed("catalogue_parse") as timing:
+        timing.bytes = len(html)
+        return html_extract.extract_intermediate_links(html, BASE_URL)
+
+def fetch_page_info(client, url):
+    """Returns the parsed intermediate page, fetching it at most once per run."""
+    info = page_cache.get(url)
+    if info:
+        metrics.increment("page_cache_hits")
+        return info
+    def attempt():
+        # The slot is taken per attempt so backoff sleeps don't hold it
+        with metrics.timed("page_fetch") as timing, governor.slot(url) as slot:
+            response = client.get(url, headers=page_cache.conditional_headers(url), extensions={"trace": metrics.trace})
+            slot.response_started(response)
+            metrics.response("page_fetch", response.status_code)
+            slot.bytes = timing.bytes = len(response.content)
+            if response.status_code != 304:
+                response.raise_for_status()
+            return page_cache.update(url, response.status_code, response.headers, response.text)
+
+    try:
+        return request_policy.run(url, attempt)
+    except Exception as e:
+        logging.error(f"Error fetching {url}: {e}")
         return None
-    soup = BeautifulSoup(html, "html.parser")
-    for a_tag in soup.find_all("a", href=True):
-        href = a_tag["href"]
-        if href.lower().endswith(".pdf"):
-            return href if href.startswith("http") else "https://nvlpubs.nist.gov" + href
-    return None
-
-def fetch_summary(intermediate_page_url):
+
+def extract_pdf_link(client, intermediate_page_url):
+    """Navigates to an intermediate page and extracts the PDF download link."""
+    with metrics.timed("pdf_link"):
+        info = fetch_page_info(client, intermediate_page_url)
+    return info["pdf_url"] if info else None
+
+def fetch_summary(client, intermediate_page_url):
     """Fetches the summary text from the SP intermediate page."""
-    html = fetch_page(intermediate_page_url)
-    if not html:
-        return "N/A"
-    soup = BeautifulSoup(html, "html.parser")
-    summary_tag = soup.find("meta", {"name": "description"})
-    return summary_tag["content"] if summary_tag else "No summary available."
\ No newline at end of file
+    with metrics.timed("summary"):
+        info = fetch_page_info(client, intermediate_page_url)
+    return info["summary"] if info else "N/A"
\ No newline at end of file
@@ -1,75 +1,376 @@
 import os
+import hashlib
 import logging
+import queue
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from tqdm import tqdm
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 import httpx
 import random
 
-from config import DOWNLOAD_DIR, SP_PAGE_URL, LIMIT_DOWNLOADS
-from utils import setup_download_dir, log_to_excel
-from data_extraction import fetch_page, extract_intermediate_links, extract_pdf_link, fetch_summary
+from .config import DOWNLOAD_DIR, SP_PAGE_URL, LIMIT_DOWNLOADS, RESOLVE_WORKERS, DOWNLOAD_WORKERS, QUEUE_SIZE, MANIFEST_FILE, LEDGER_FILE, EXCEL_FILE, RETRY_BUDGET, SEGMENTED_DOWNLOADS, SEGMENT_THRESHOLD, MAX_SEGMENTS, METRICS_TEXTFILE, RUN_SUMMARY_DIR, SEARCH_INDEX_FILE, UPDATE_SEARCH_INDEX, ANALYZE_PDFS, PDF_WORKERS, CRAWL_ALL_PAGES, CATALOGUE_CONCURRENCY, MAX_CATALOGUE_PAGES, PLAN_FILE, PLAN_MAX_AGE, DOWNLOAD_TIMEOUT, CHUNK_SIZE
+from .logging_utils import setup_download_dir
+from .ledger import open_ledger, export_excel
+from . import resume
+from . import segmented
+from .manifest import Manifest
+from .catalogue import CatalogueCrawl
+from .store import canonical_url
+from .search_index import SearchIndex, update_index
+from . import pdf_text
+from .plan import reuse_plan
+from .data_extraction import create_client, fetch_page, extract_intermediate_links, extract_pdf_link, fetch_summary, governor, request_policy, metrics, content_store, page_cache
 
-def download_pdf(client, title, url, intermediate_url):
-    """Downloads a PDF with retries, logs size, time, and summary."""
+def _download_attempt(client, title, url, intermediate_url, file_path, manifest, sync):
+    """Makes one download attempt; returns the file size, or None if unchanged.
+
+    A partial left by an earlier attempt or run is resumed.
+    """
+    state = resume.load_state(file_path, url)
+    headers = resume.resume_headers(state)
+    if sync and not headers:
+        headers = manifest.conditional_headers(intermediate_url, url)
+    with governor.slot(url) as slot, client.stream("GET", url, headers=headers, follow_redirects=True, timeout=httpx.Timeout(DOWNLOAD_TIMEOUT, pool=None), extensions={"trace": metrics.trace}) as response:
+        slot.response_started(response)
+        metrics.response("download", response.status_code)
+        metrics.observe("download_ttfb", slot.latency)
+        if response.status_code == 304:
+            manifest.touch(intermediate_url)
+            return None
+        if response.status_code == 416:
+            resume.discard(file_path)  # Stale partial, the retry starts from zero
+        response.raise_for_status()
+        offset = resume.start_offset(response, state)
+        total_size = int(response.headers.get("content-length", 0)) + offset or None
+        ranges = segmented.plan(response, offset, SEGMENT_THRESHOLD, MAX_SEGMENTS) if SEGMENTED_DOWNLOADS else None
+
+        from tqdm import tqdm  # Imported on first download, keeping startup fast
+        with tqdm(
+            desc=f"Downloading: {title}",
+            total=total_size,
+            initial=offset,
+            unit="B",
+            unit_scale=True
+        ) as progress, metrics.timed("download_transfer") as timing:
+            if ranges:
+                logging.info(f"Fetching {title} in {len(ranges)} segments")
+                size_bytes, digest = _download_segments(response, url, file_path, ranges, slot, progress)
+            else:
+                sha256 = hashlib.sha256()
+                if offset:
+                    logging.info(f"Resuming {title} from byte {offset}")
+                    resume.hash_partial(file_path, sha256)
+                resume.save_state(file_path, url, response)
+                size_bytes = offset
+                with open(resume.part_path(file_path), "ab" if offset else "wb") as file:
+                    for chunk in response.iter_bytes(CHUNK_SIZE):
+                        file.write(chunk)
+                        sha256.update(chunk)
+                        size_bytes += len(chunk)
+                        slot.bytes += len(chunk)
+                        progress.update(len(chunk))
+                digest = sha256.hexdigest()
+            timing.bytes = size_bytes - offset
+    # Store by content; {title}.pdf becomes a link to the stored object
+    if content_store.commit(resume.part_path(file_path), digest, file_path):
+        metrics.increment("deduplicated", kind="content")
+        logging.info(f"{title} is identical to a stored PDF; linked instead of storing a second copy")
+    resume.discard_state(file_path)
+    manifest.record(
+        intermediate_url, title, url, file_path,
+        response.headers.get("etag"), response.headers.get("last-modified"),
+        size_bytes, digest,
+    )
+    return size_bytes
+
+def _download_segments(response, url, file_path, ranges, slot, progress):
+    """Fetches a PDF as parallel byte ranges into a preallocated .part file.
+
+    The open response supplies the first range; the others go over separate
+    HTTP/1.1 connections, since HTTP/2 would multiplex them onto one.
+    Returns (size, sha256) after checking the assembled file.
+    """
+    validator = segmented.validator(response)
+    etag = response.headers.get("etag")
+    size = ranges[-1][1] + 1
+    part = resume.part_path(file_path)
+    resume.discard_state(file_path)  # A preallocated .part must not look resumable
+
+    def fetch(stream, start, end):
+        position = start
+        for chunk in stream.iter_bytes(CHUNK_SIZE):
+            written = segmented.write_chunk(fd, chunk, position, end)
+            position += written
+            slot.bytes += written
+            progress.update(written)
+            if position > end:
+                break
+        segmented.check_complete(start, end, position)
+
+    def fetch_range(segment_client, start, end):
+        headers = segmented.range_headers(start, end, validator)
+        with segment_client.stream("GET", url, headers=headers, extensions={"trace": metrics.trace}) as part_response:
+            metrics.response("download_segment", part_response.status_code)
+            part_response.raise_for_status()
+            segmented.check_segment(part_response, start, end, etag)
+            fetch(part_response, start, end)
+
+    fd = segmented.preallocate(part, size)
+    try:
+        with httpx.Client(timeout=DOWNLOAD_TIMEOUT, follow_redirects=True) as segment_client, ThreadPoolExecutor(len(ranges) - 1) as executor:
+            futures = [executor.submit(fetch_range, segment_client, start, end) for start, end in ranges[1:]]
+            try:
+                fetch(response, *ranges[0])
+            finally:
+                # Every segment finishes before fd is closed
+                errors = [future.exception() for future in futures]
+    finally:
+        os.close(fd)
+    for error in errors:
+        if error:
+            raise error
+    return size, segmented.verify(part, size)
+
+def _link_duplicate(client, title, url, intermediate_url, manifest, source_url, sync=False):
+    """Links title to the PDF already downloaded for source_url; returns its log row.
+
+    Like download_pdf, returns None in sync mode if the link was already
+    current. Returns False when there is nothing to link to.
+    """
+    entry = manifest.get(source_url) if source_url else None
+    if not entry or not content_store.has(entry["sha256"]):
+        return False
+    file_path = os.path.join(DOWNLOAD_DIR, f"{title}.pdf")
+    current = manifest.get(intermediate_url)
+    if sync and current and current["sha256"] == entry["sha256"] and os.path.exists(file_path):
+        manifest.touch(intermediate_url)
+        return None
+    content_store.link(entry["sha256"], file_path)
+    manifest.record(
+        intermediate_url, title, url, file_path,
+        entry["etag"], entry["last_modified"], entry["size"], entry["sha256"],
+    )
+    metrics.increment("deduplicated", kind="url")
+    logging.info(f"{title} points at the same PDF as {entry['title']}; linked instead of downloading it again")
+    return (title, "Linked", entry["size"] / (1024 * 1024), 0.0, fetch_summary(client, intermediate_url))
+
+def download_pdf(client, title, url, intermediate_url, manifest, sync=False):
+    """Downloads a PDF and returns its log row.
+
+    Failed attempts are retried under the request policy, each resuming from
+    the bytes already on disk. In sync mode a document whose manifest entry
+    is still current is skipped and None is returned.
+    """
     file_path = os.path.join(DOWNLOAD_DIR, f"{title}.pdf")
     start_time = time.time()
-    size_mb = 0
-    summary = fetch_summary(intermediate_url)  # Fetch the summary before downloading
+    summary = fetch_summary(client, intermediate_url)  # Fetch the summary before downloading
 
     try:
-        with client.stream("GET", url, follow_redirects=True, timeout=20) as response:
-            response.raise_for_status()
-            total_size = int(response.headers.get("content-length", 0))
-            size_mb = total_size / (1024 * 1024)  # Convert to MB
-
-            with open(file_path, "wb") as file, tqdm(
-                desc=f"Downloading: {title}",
-                total=total_size,
-                unit="B",
-                unit_scale=True
-            ) as progress:
-                for chunk in response.iter_bytes(128 * 1024):
-                    file.write(chunk)
-                    progress.update(len(chunk))
-
+        with metrics.timed("download") as timing:
+            size_bytes = request_policy.run(
+                url,
+                lambda: _download_attempt(client, title, url, intermediate_url, file_path, manifest, sync),
+                retry_statuses={416},
+            )
+            timing.bytes = size_bytes or 0
+        if size_bytes is None:
+            metrics.increment("documents", status="Unchanged")
+            logging.info(f"Unchanged: {title}")
+            return None
+        size_mb = size_bytes / (1024 * 1024)  # Convert to MB
         time_taken = time.time() - start_time
+        metrics.increment("documents", status="Success")
         logging.info(f"Downloaded: {file_path} ({size_mb:.2f} MB in {time_taken:.2f}s)")
-        log_to_excel(title, "Success", size_mb, time_taken, summary)
+        return (title, "Success", size_mb, time_taken, summary)
 
     except Exception as e:
+        # The .part file and its sidecar are kept so the next run can resume
         time_taken = time.time() - start_time
+        size_mb = resume.partial_size(file_path) / (1024 * 1024)
+        metrics.increment("documents", status="Failed")
         logging.error(f"Failed to download {title}: {e}")
-        log_to_excel(title, "Failed", size_mb, time_taken, summary)
+        return (title, "Failed", size_mb, time_taken, summary)
+
+_DONE = object()  # End-of-stream marker passed between stages
+
+def _start_stage(inbox, handler, workers, outbox=None, downstream_workers=0):
+    """Starts `workers` threads consuming inbox; returns a thread that joins them."""
+    def worker():
+        while (item := inbox.get()) is not _DONE:
+            try:
+                result = handler(*item)
+            except Exception as e:
+                logging.error(f"Pipeline stage {handler.__name__} failed on {item[0]}: {e}")
+                continue
+            if outbox is not None and result is not None:
+                outbox.put(result)
+
+    def supervise():
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for _ in range(downstream_workers):
+            outbox.put(_DONE)
+
+    supervisor = threading.Thread(target=supervise, daemon=True)
+    supervisor.start()
+    return supervisor
 
-def download_all_pdfs():
-    """Main function to fetch links, extract PDFs, and download concurrently."""
+def download_all_pdfs(sync=False):
+    """Main function to fetch links, extract PDFs, and download concurrently.
+
+    With sync=True only new or changed publications are downloaded.
+    """
     setup_download_dir()
-    main_page_html = fetch_page(SP_PAGE_URL)
-    if not main_page_html:
-        logging.error("Failed to fetch main page. Exiting.")
-        return
+    metrics.reset()
+    governor.reset()
+    request_policy.reset()
+    reuse_plan(page_cache, PLAN_FILE, PLAN_MAX_AGE)
+    # Started while this is still the only thread; see pdf_text.start_pool
+    pool = pdf_text.start_pool(PDF_WORKERS) if ANALYZE_PDFS else None
+    try:
+        # One pooled client for the whole run: pages, summaries and PDFs
+        with create_client() as client:
+            _download_catalogue(client, pool, sync)
+    finally:
+        if pool:
+            pool.shutdown()
+        # Every run is recorded, including one that couldn't fetch the catalogue
+        metrics.export(METRICS_TEXTFILE, RUN_SUMMARY_DIR)
 
-    intermediate_links = extract_intermediate_links(main_page_html)
-    logging.info(f"Found {len(intermediate_links)} intermediate links to process.")
+def _feed_catalogue(client, main_page_html, resolve_queue, manifest, sync):
+    """Queues the catalogue's entries for the pipeline as its pages arrive.
 
+    The pages after the first are fetched CATALOGUE_CONCURRENCY at a time.
+    In sync mode the crawl stops at a page of already known entries.
+    """
     if LIMIT_DOWNLOADS:
+        intermediate_links = extract_intermediate_links(main_page_html)
         all_titles = list(intermediate_links.keys())
-        # Randomly pick 5 titles from the available links
+        # Randomly pick 5 titles from the first catalogue page
         selected_titles = random.sample(all_titles, min(5, len(all_titles)))
-        intermediate_links = {title: intermediate_links[title] for title in selected_titles}
         logging.info(f"LIMIT_DOWNLOADS is True. Only these 5 documents will be downloaded: {', '.join(selected_titles)}")
+        for title in selected_titles:
+            resolve_queue.put((title, intermediate_links[title]))
+        return
+
+    crawl = CatalogueCrawl(
+        SP_PAGE_URL, extract_intermediate_links, CATALOGUE_CONCURRENCY,
+        is_known=(lambda url: manifest.get(url) is not None) if sync else None,
+        max_pages=MAX_CATALOGUE_PAGES if CRAWL_ALL_PAGES else 1,
+    )
+
+    def queue_entries(entries):
+        for title, intermediate_url in entries.items():
+            resolve_queue.put((title, intermediate_url))
+
+    queue_entries(crawl.add_page(main_page_html, first=True))
+    metrics.increment("catalogue_pages")
+    with ThreadPoolExecutor(CATALOGUE_CONCURRENCY) as executor:
+        while wave := crawl.next_wave():
+            for future in as_completed([executor.submit(fetch_page, client, url) for url in wave]):
+                html = future.result()
+                if html:  # fetch_page logs the pages it couldn't get
+                    queue_entries(crawl.add_page(html))
+                    metrics.increment("catalogue_pages")
+    logging.info(f"Catalogue: {crawl.describe()}")
+
+def _download_catalogue(client, pool, sync):
+    """Runs the catalogue -> resolve -> download -> analyze -> record pipeline."""
+    main_page_html = fetch_page(client, SP_PAGE_URL)
+    if not main_page_html:
+        logging.error("Failed to fetch main page. Exiting.")
+        return
+
+    resolve_queue = queue.Queue(QUEUE_SIZE)
+    download_queue = queue.Queue(QUEUE_SIZE)
+    # Unbounded, so slow PDF parsing never holds up the downloads
+    analyze_queue = queue.Queue()
+    record_queue = queue.Queue(QUEUE_SIZE)
+
+    def resolve(title, intermediate_url):
+        pdf_url = extract_pdf_link(client, intermediate_url)
+        if not pdf_url:
+            logging.warning(f"No PDF link found for {title} ({intermediate_url})")
+            return None
+        return (title, pdf_url, intermediate_url)
+
+    manifest = Manifest(MANIFEST_FILE)
+    ledger = open_ledger(LEDGER_FILE, EXCEL_FILE)
+    index = SearchIndex(SEARCH_INDEX_FILE) if pool and UPDATE_SEARCH_INDEX else None
+    # Canonical PDF URL -> future of the intermediate URL whose download got
+    # it (None if that failed), so entries sharing a PDF fetch it only once
+    claims = {}
+    claims_lock = threading.Lock()
+
+    try:
+        def download(title, pdf_url, intermediate_url):
+            key = canonical_url(pdf_url)
+            with claims_lock:
+                claim = claims.get(key)
+                owner = claim is None
+                if owner:
+                    claims[key] = claim = Future()
+            if owner:
+                try:
+                    row = download_pdf(client, title, pdf_url, intermediate_url, manifest, sync)
+                except BaseException:
+                    claim.set_result(None)
+                    raise
+                claim.set_result(intermediate_url if row is None or row[1] == "Success" else None)
+            else:
+                row = _link_duplicate(client, title, pdf_url, intermediate_url, manifest, claim.result(), sync)
+                if row is False:
+                    row = download_pdf(client, title, pdf_url, intermediate_url, manifest, sync)
+            return (row, intermediate_url) if row else None
 
-    logging.info(f"Processing {len(intermediate_links)} documents after applying the limit.")
+        def analyze(row, intermediate_url):
+            # Summarizes new PDFs in the process pool; the thread just waits
+            entry = manifest.get(intermediate_url)
+            if pool is None or row[1] not in ("Success", "Linked") or not entry:
+                return (row, None, None)
+            result = pool.submit(pdf_text.analyze, entry["file_path"]).result()
+            metrics.observe("pdf_analyze", result["seconds"], entry["size"])
+            if result["error"]:
+                logging.warning(f"Could not extract text from {row[0]}: {result['error']}")
+            if result["summary"]:
+                row = row[:4] + (result["summary"],)  # Replaces the page's meta description
+            return (row, entry["sha256"], result)
 
-    with ThreadPoolExecutor(max_workers=3) as executor, httpx.Client(http2=True) as client:
-        futures = []
-        for title, intermediate_url in intermediate_links.items():
-            pdf_url = extract_pdf_link(intermediate_url)
-            if pdf_url:
-                futures.append(executor.submit(download_pdf, client, title, pdf_url, intermediate_url))
+        def record(row, sha256, result):
+            ledger.record(*row)
+            if index is not None and result is not None:
+                index.add(sha256, result["pages"], result["error"])
 
-        for future in as_completed(futures):
-            pass
+        stages = [
+            _start_stage(resolve_queue, resolve, RESOLVE_WORKERS, download_queue, DOWNLOAD_WORKERS),
+            _start_stage(download_queue, download, DOWNLOAD_WORKERS, analyze_queue, PDF_WORKERS),
+            _start_stage(analyze_queue, analyze, PDF_WORKERS, record_queue, 1),
+            _start_stage(record_queue, record, 1),
+        ]
+        try:
+            _feed_catalogue(client, main_page_html, resolve_queue, manifest, sync)
+        finally:
+            for _ in range(RESOLVE_WORKERS):
+                resolve_queue.put(_DONE)
 
-    logging.info("All downloads complete.")
\ No newline at end of file
+        for stage in stages:
+            stage.join()
+        logging.info(f"Concurrency governor: {governor.describe()}")
+        logging.info(f"Retries used: {request_policy.retries}/{RETRY_BUDGET}")
+        if index is not None:
+            index.close()
+            index = None  # update_index opens the index itself
+        if UPDATE_SEARCH_INDEX:
+            with metrics.timed("search_index"):
+                update_index(SEARCH_INDEX_FILE, manifest, pool)  # PDFs the pipeline didn't analyze
+    finally:
+        # Also on Ctrl-C or a failed stage, so the ledger's queued rows are written
+        if index is not None:
+            index.close()
+        manifest.close()
+        ledger.close()
+        export_excel(LEDGER_FILE, EXCEL_FILE)  # Rebuilt once per run instead of once per row
+    logging.info("All downloads complete.")
@@ -0,0 +1,195 @@
+import time
+import asyncio
+import logging
+import threading
+import statistics
+from contextlib import contextmanager, asynccontextmanager
+from urllib.parse import urlsplit
+import httpx
+
+BACKOFF_STATUSES = {429, 503}
+LATENCY_TOLERANCE = 2.0  # Window latency above this multiple of the baseline counts as rising
+WINDOW_SECONDS = 2.0
+
+class HostLimit:
+    """AIMD concurrency limit and throughput estimate for one host.
+
+    At the end of each window the limit grows by one if the host was kept busy,
+    throughput did not drop and latency stayed near its baseline.
+    Rising latency shrinks it by a quarter; a timeout, 429 or 503 halves it
+    (at most once per window, so one burst of errors doesn't collapse it).
+    """
+
+    def __init__(self, initial, min_limit, max_limit):
+        self.limit = initial
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.in_flight = 0
+        self.throughput = 0.0  # bytes/s over the last window
+        self.latency = None  # median seconds over the last window
+        self._base_latency = None
+        self._saturated = False
+        self._last_backoff = 0.0
+        self._reset_window(time.monotonic())
+
+    def _reset_window(self, now):
+        self._window_start = now
+        self._window_bytes = 0
+        self._window_latencies = []
+        self._saturated = self.in_flight >= self.limit
+
+    def note_waiting(self):
+        self._saturated = True
+
+    def record(self, latency, nbytes, overloaded):
+        now = time.monotonic()
+        if overloaded:
+            if now - self._last_backoff >= WINDOW_SECONDS:
+                self._set_limit(self.limit // 2, "backing off after timeout/throttling")
+                self._last_backoff = now
+            return
+        self._window_bytes += nbytes
+        self._window_latencies.append(latency)
+        if now - self._window_start < WINDOW_SECONDS:
+            return
+
+        throughput = self._window_bytes / (now - self._window_start)
+        latency = statistics.median(self._window_latencies)
+        # The baseline creeps up 10% per window so a lasting shift in path
+        # latency becomes the new normal instead of pinning the limit at the floor.
+        if self._base_latency is None:
+            self._base_latency = latency
+        self._base_latency = min(latency, self._base_latency * 1.1)
+        if latency > self._base_latency * LATENCY_TOLERANCE:
+            self._set_limit(int(self.limit * 0.75), f"latency rising ({latency * 1000:.0f} ms)")
+        elif self._saturated and throughput >= self.throughput * 0.95:
+            self._set_limit(self.limit + 1, "throughput holding")
+        self.throughput = throughput
+        self.latency = latency
+        self._reset_window(now)
+
+    def _set_limit(self, limit, reason):
+        limit = max(self.min_limit, min(self.max_limit, limit))
+        if limit != self.limit:
+            logging.debug(f"Concurrency limit {self.limit} -> {limit}: {reason}")
+        self.limit = limit
+
+class Slot:
+    """One in-flight request; callers note when headers arrive and the bytes moved."""
+
+    def __init__(self):
+        self.start = time.monotonic()
+        self.first_byte = None
+        self.bytes = 0
+        self.overloaded = False
+
+    def response_started(self, response):
+        self.first_byte = time.monotonic()
+        if response.status_code in BACKOFF_STATUSES:
+            self.overloaded = True
+
+    def failed(self, error):
+        if isinstance(error, httpx.TimeoutException):
+            self.overloaded = True
+        elif isinstance(error, httpx.HTTPStatusError) and error.response.status_code in BACKOFF_STATUSES:
+            self.overloaded = True
+
+    @property
+    def latency(self):
+        # Time to first byte, so large downloads don't read as a slow server
+        return (self.first_byte or time.monotonic()) - self.start
+
+class _Governor:
+    def __init__(self, initial=4, min_limit=1, max_limit=16):
+        self.initial = initial
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self._hosts = {}
+
+    def reset(self):
+        """Starts a new run: every host goes back to the initial limit."""
+        self._hosts = {}
+
+    def _host(self, url):
+        host = urlsplit(url).hostname
+        if host not in self._hosts:
+            self._hosts[host] = HostLimit(self.initial, self.min_limit, self.max_limit)
+        return self._hosts[host]
+
+    def snapshot(self):
+        """Current limit, in-flight count, throughput and latency per host."""
+        return {
+            host: {
+                "limit": state.limit,
+                "in_flight": state.in_flight,
+                "throughput_mb_s": round(state.throughput / (1024 * 1024), 2),
+                "latency_ms": round(state.latency * 1000) if state.latency is not None else None,
+            }
+            for host, state in self._hosts.items()
+        }
+
+    def describe(self):
+        return ", ".join(
+            f"{host}: limit {s['limit']}, {s['throughput_mb_s']} MB/s, {s['latency_ms']} ms"
+            for host, s in self.snapshot().items()
+        )
+
+class ThreadGovernor(_Governor):
+    """Per-host AIMD concurrency governor for worker threads."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def slot(self, url):
+        """Blocks until the host has a free slot, then holds it for the request."""
+        with self._cond:
+            state = self._host(url)
+            while state.in_flight >= state.limit:
+                state.note_waiting()
+                self._cond.wait()
+            state.in_flight += 1
+        slot = Slot()
+        try:
+            yield slot
+        except Exception as e:
+            slot.failed(e)
+            raise
+        finally:
+            with self._cond:
+                state.in_flight -= 1
+                state.record(slot.latency, slot.bytes, slot.overloaded)
+                self._cond.notify_all()
+
+class AsyncGovernor(_Governor):
+    """Per-host AIMD concurrency governor for asyncio tasks."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cond = asyncio.Condition()
+
+    def reset(self):
+        super().reset()
+        self._cond = asyncio.Condition()  # Each run has its own event loop
+
+    @asynccontextmanager
+    async def slot(self, url):
+        """Waits until the host has a free slot, then holds it for the request."""
+        async with self._cond:
+            state = self._host(url)
+            while state.in_flight >= state.limit:
+                state.note_waiting()
+                await self._cond.wait()
+            state.in_flight += 1
+        slot = Slot()
+        try:
+            yield slot
+        except Exception as e:
+            slot.failed(e)
+            raise
+        finally:
+            state.in_flight -= 1
+            state.record(slot.latency, slot.bytes, slot.overloaded)
+            async with self._cond:
+                self._cond.notify_all()
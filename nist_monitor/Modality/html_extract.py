@@ -0,0 +1,303 @@
+import html
+import html.entities
+import re
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+
+PDF_HOST = "https://nvlpubs.nist.gov"
+DEFAULT_BACKEND = "stream"
+PAGE_PARAMS = ("page", "page-lg", "pageNumber", "p")  # Query parameters that number result pages
+
+# Tags BeautifulSoup closes as soon as they open, and tags whose text it keeps
+# out of get_text(); the stream backend mirrors both to give identical output.
+EMPTY_ELEMENT_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "keygen", "link",
+    "menuitem", "meta", "param", "source", "track", "wbr", "basefont", "bgsound",
+    "command", "frame", "image", "isindex", "nextid", "spacer",
+}
+STRING_CONTAINER_TAGS = {"rt", "rp", "style", "script", "template"}
+# The named entities bs4 decodes (its EntitySubstitution table), without importing bs4
+ENTITY_TO_CHARACTER = {name[:-1]: character for name, character in html.entities.html5.items() if name.endswith(";")}
+
+def _link_title(text):
+    return text.replace("/", "_") or "SP_Document"
+
+def _add_link(links, title, url):
+    # Link text isn't unique (revisions, drafts); a second URL under a title
+    # already taken gets the path as a suffix instead of overwriting the first.
+    if links.get(title, url) != url:
+        slug = urlsplit(url).path.removeprefix("/pubs/sp/").strip("/").removesuffix("/final").replace("/", "-")
+        title = f"{title} [{slug}]"
+    links[title] = url
+    return title
+
+def _pdf_url(href):
+    return href if href.startswith("http") else PDF_HOST + href
+
+# bs4 backend: the original full-tree parse, kept as the reference output
+
+def _bs4_intermediate_links(html_text, base_url):
+    from bs4 import BeautifulSoup  # Reference backend only; the default doesn't load bs4
+    soup = BeautifulSoup(html_text, "html.parser")
+    intermediate_links = {}
+    for a_tag in soup.find_all("a", href=True):
+        href = a_tag["href"]
+        if href.startswith("/pubs/sp/"):
+            _add_link(intermediate_links, _link_title(a_tag.get_text(strip=True)), base_url + href)
+    return intermediate_links
+
+def _bs4_intermediate_page(html_text):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html_text, "html.parser")
+    pdf_url = None
+    for a_tag in soup.find_all("a", href=True):
+        href = a_tag["href"]
+        if href.lower().endswith(".pdf"):
+            pdf_url = _pdf_url(href)
+            break
+    summary_tag = soup.find("meta", {"name": "description"})
+    title_tag = soup.find("title")
+    return {
+        "pdf_url": pdf_url,
+        "summary": summary_tag["content"] if summary_tag else "No summary available.",
+        "page_title": title_tag.get_text(strip=True) if title_tag else None,
+    }
+
+# stream backend: one pass over html.parser's token stream, no tree
+
+class _StopParsing(Exception):
+    pass
+
+class _TokenScanner(HTMLParser):
+    """Tokenizes like BeautifulSoup's html.parser builder without building a tree.
+
+    It tracks only the stack of open tag names, so implicit closes (an end tag
+    popping everything above it) and text grouping match the bs4 tree, and
+    reports the text of the elements subclasses ask for via `capture`.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self._stack = []
+        self._already_closed = []
+        self._text = []
+        self._containers = 0
+        self._captures = []  # [tag stack depth, list of text pieces]
+
+    def capture(self):
+        """Starts collecting get_text(strip=True) of the tag just opened."""
+        pieces = []
+        self._captures.append([len(self._stack), pieces])
+        return pieces
+
+    def on_start(self, tag, attrs):
+        pass
+
+    def on_end(self, tag):
+        pass
+
+    def _end_data(self):
+        if not self._text:
+            return
+        text = "".join(self._text).strip()
+        self._text = []
+        if text and not self._containers:
+            for _, pieces in self._captures:
+                pieces.append(text)
+
+    def _pop(self):
+        tag = self._stack.pop()
+        if tag in STRING_CONTAINER_TAGS:
+            self._containers -= 1
+        while self._captures and self._captures[-1][0] > len(self._stack):
+            self._captures.pop()
+        self.on_end(tag)
+
+    def _pop_to(self, tag):
+        if tag not in self._stack:
+            return
+        while self._stack and self._stack[-1] != tag:
+            self._pop()
+        self._pop()
+
+    def handle_starttag(self, tag, attrs, empty=True):
+        self._end_data()
+        attr_dict = {}
+        for key, value in attrs:
+            attr_dict[key] = "" if value is None else value
+        self._stack.append(tag)
+        if tag in STRING_CONTAINER_TAGS:
+            self._containers += 1
+        self.on_start(tag, attr_dict)
+        if empty and tag in EMPTY_ELEMENT_TAGS:
+            self.handle_endtag(tag, check_already_closed=False)
+            self._already_closed.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs, empty=False)
+        self.handle_endtag(tag, check_already_closed=False)
+
+    def handle_endtag(self, tag, check_already_closed=True):
+        if check_already_closed and tag in self._already_closed:
+            self._already_closed.remove(tag)
+            return
+        self._end_data()
+        self._pop_to(tag)
+
+    def handle_data(self, data):
+        self._text.append(data)
+
+    def handle_entityref(self, name):
+        character = ENTITY_TO_CHARACTER.get(name)
+        self.handle_data(character if character is not None else f"&{name}")
+
+    def handle_charref(self, name):
+        self.handle_data(html.unescape(f"&#{name};"))
+
+    def handle_comment(self, data):
+        self._end_data()
+
+    def handle_decl(self, decl):
+        self._end_data()
+
+    def unknown_decl(self, data):
+        self._end_data()
+        if data.upper().startswith("CDATA["):
+            # bs4 keeps a CDATA section as a CData string, which get_text includes
+            self._text.append(data[len("CDATA["):])
+            self._end_data()
+
+    def handle_pi(self, data):
+        self._end_data()
+
+    def scan(self, html_text):
+        try:
+            self.feed(html_text)
+            self.close()
+        except _StopParsing:
+            pass
+        self._end_data()
+        return self
+
+class _LinkScanner(_TokenScanner):
+    def __init__(self):
+        super().__init__()
+        self.links = []  # (href, text pieces) in document order
+
+    def on_start(self, tag, attrs):
+        if tag == "a" and "href" in attrs and attrs["href"].startswith("/pubs/sp/"):
+            self.links.append((attrs["href"], self.capture()))
+
+class _PageScanner(_TokenScanner):
+    def __init__(self):
+        super().__init__()
+        self.pdf_href = None
+        self.meta = None
+        self.title = None
+        self._title_open = False
+
+    def on_start(self, tag, attrs):
+        if tag == "a" and self.pdf_href is None and "href" in attrs and attrs["href"].lower().endswith(".pdf"):
+            self.pdf_href = attrs["href"]
+        elif tag == "meta" and self.meta is None and attrs.get("name") == "description":
+            self.meta = attrs
+        elif tag == "title" and self.title is None:
+            self.title = self.capture()
+            self._title_open = True
+        self._stop_if_done()
+
+    def on_end(self, tag):
+        if self._title_open:
+            self._title_open = any(pieces is self.title for _, pieces in self._captures)
+        self._stop_if_done()
+
+    def _stop_if_done(self):
+        # Everything after the first PDF link, description and title is irrelevant
+        if self.pdf_href is not None and self.meta is not None and self.title is not None and not self._title_open:
+            raise _StopParsing()
+
+class _AnchorScanner(_TokenScanner):
+    def __init__(self):
+        super().__init__()
+        self.hrefs = []
+
+    def on_start(self, tag, attrs):
+        if tag == "a" and attrs.get("href"):
+            self.hrefs.append(attrs["href"])
+
+def _stream_intermediate_links(html_text, base_url):
+    intermediate_links = {}
+    for href, pieces in _LinkScanner().scan(html_text).links:
+        _add_link(intermediate_links, _link_title("".join(pieces)), base_url + href)
+    return intermediate_links
+
+def _stream_intermediate_page(html_text):
+    scanner = _PageScanner().scan(html_text)
+    return {
+        "pdf_url": _pdf_url(scanner.pdf_href) if scanner.pdf_href is not None else None,
+        "summary": scanner.meta["content"] if scanner.meta is not None else "No summary available.",
+        "page_title": "".join(scanner.title) if scanner.title is not None else None,
+    }
+
+BACKENDS = {
+    "bs4": (_bs4_intermediate_links, _bs4_intermediate_page),
+    "stream": (_stream_intermediate_links, _stream_intermediate_page),
+}
+
+def extract_intermediate_links(html_text, base_url, backend=None):
+    """Maps link text to the absolute URL of every SP intermediate page linked."""
+    return BACKENDS[backend or DEFAULT_BACKEND][0](html_text, base_url)
+
+def parse_intermediate_page(html_text, backend=None):
+    """Extracts the PDF link, summary and page title of an SP page in one parse."""
+    return BACKENDS[backend or DEFAULT_BACKEND][1](html_text)
+
+def _page_number(url):
+    """Returns (parameter, page number) of a result-page URL, or None."""
+    for key, value in parse_qsl(urlsplit(url).query):
+        if key in PAGE_PARAMS and re.fullmatch(r"\d+", value):
+            return key, int(value)
+    return None
+
+def extract_pagination(html_text, listing_url):
+    """Maps page number to the absolute URL of every other page of a result listing.
+
+    Pagination links are anchors back to the listing's path whose query
+    numbers the page (?page=3, ?page-lg=3, ...). Pages are assumed to count
+    from 1, the page at listing_url. Numbers the pager elides ("1 2 3 ... 57")
+    are filled in from the highest one linked.
+    """
+    listing_path = urlsplit(listing_url).path.rstrip("/")
+    template = None
+    last = 1
+    for href in _AnchorScanner().scan(html_text).hrefs:
+        url = urljoin(listing_url, html.unescape(href))
+        found = _page_number(url)
+        if found and urlsplit(url).path.rstrip("/") == listing_path:
+            template = template or (url, found[0])
+            last = max(last, found[1])
+    if template is None:
+        return {}
+    url, key = template
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query)
+
+    def page_url(number):
+        page_query = [(k, str(number) if k == key else v) for k, v in query]
+        return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(page_query), ""))
+
+    return {number: page_url(number) for number in range(2, last + 1)}
+
+def merge_links(links, page_links):
+    """Adds one listing page's links to those of earlier pages; returns the ones added.
+
+    A URL already listed is skipped, since entries shift between pages when
+    a publication is added while the listing is being crawled.
+    """
+    listed = set(links.values())
+    added = {}
+    for title, url in page_links.items():
+        if url not in listed:
+            added[_add_link(links, title, url)] = url
+            listed.add(url)
+    return added
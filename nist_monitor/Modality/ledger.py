@@ -0,0 +1,112 @@
+import os
+import json
+import queue
+import logging
+import threading
+import time
+from datetime import datetime
+
+LEDGER_COLUMNS = ["Title", "Timestamp", "Size (MB)", "Time (s)", "Status", "Summary"]
+_STOP = object()
+
+class RunLedger:
+    """Append-only JSONL log of download results.
+
+    `record` only enqueues the row, so it is cheap and safe to call from any
+    thread or from the event loop. One background writer appends the rows and
+    flushes them in batches of batch_size or every flush_interval seconds.
+    """
+
+    def __init__(self, path, batch_size=50, flush_interval=2.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_rows, name="ledger-writer", daemon=True)
+        self._writer.start()
+
+    def record(self, title, status, size_mb, time_taken, summary):
+        """Queues one download result for the ledger."""
+        self._queue.put({
+            "title": title,
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "size_mb": round(size_mb, 2),
+            "time_s": round(time_taken, 2),
+            "status": status,
+            "summary": summary,
+        })
+
+    def close(self):
+        """Writes every queued row and stops the writer."""
+        self._queue.put(_STOP)
+        self._writer.join()
+
+    def _write_rows(self):
+        with open(self.path, "a", encoding="utf-8") as file:
+            pending = 0
+            last_flush = time.monotonic()
+            while True:
+                try:
+                    row = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    row = None
+                if row is _STOP:
+                    break
+                if row is not None:
+                    file.write(json.dumps(row, ensure_ascii=False) + "\n")
+                    pending += 1
+                if pending and (pending >= self.batch_size or time.monotonic() - last_flush >= self.flush_interval):
+                    file.flush()
+                    pending = 0
+                    last_flush = time.monotonic()
+
+def read_ledger(path):
+    """Yields the ledger rows in the order they were written."""
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+def import_excel(excel_path, ledger_path):
+    """Seeds a new ledger with the rows of an existing Excel log."""
+    from openpyxl import load_workbook
+    workbook = load_workbook(excel_path, read_only=True)
+    rows = workbook.active.iter_rows(min_row=2, values_only=True)
+    with open(ledger_path, "w", encoding="utf-8") as file:
+        for title, timestamp, size_mb, time_taken, status, summary, *_ in rows:
+            file.write(json.dumps({
+                "title": title,
+                "timestamp": timestamp,
+                "size_mb": float(size_mb or 0),
+                "time_s": float(time_taken or 0),
+                "status": status,
+                "summary": summary,
+            }, ensure_ascii=False) + "\n")
+    workbook.close()
+    logging.info(f"Imported existing Excel log {excel_path} into {ledger_path}")
+
+def export_excel(ledger_path, excel_path):
+    """Writes the whole ledger to an Excel file using openpyxl's write-only mode."""
+    from openpyxl import Workbook  # Only Excel export and migration need openpyxl
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Download Log")
+    sheet.append(LEDGER_COLUMNS)
+    for row in read_ledger(ledger_path):
+        sheet.append([
+            row["title"],
+            row["timestamp"],
+            f"{row['size_mb']:.2f}",
+            f"{row['time_s']:.2f}",
+            row["status"],
+            row["summary"],
+        ])
+    tmp_path = excel_path + ".tmp"
+    workbook.save(tmp_path)
+    os.replace(tmp_path, excel_path)
+    logging.info(f"Exported download ledger to {excel_path}")
+
+def open_ledger(ledger_path, excel_path):
+    """Opens the run ledger, migrating the Excel history on first use."""
+    if not os.path.exists(ledger_path) and os.path.exists(excel_path):
+        import_excel(excel_path, ledger_path)
+    return RunLedger(ledger_path)
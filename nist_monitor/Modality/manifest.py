@@ -0,0 +1,81 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from .store import canonical_url
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    intermediate_url TEXT PRIMARY KEY,
+    title TEXT,
+    pdf_url TEXT,
+    file_path TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    size INTEGER,
+    sha256 TEXT,
+    last_checked TEXT
+)
+"""
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+class Manifest:
+    """SQLite index of every downloaded SP document, keyed by intermediate URL.
+
+    Safe to share between the download threads; writes are serialized.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(SCHEMA)
+
+    def get(self, intermediate_url):
+        """Returns the manifest row for a document as a dict, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM documents WHERE intermediate_url = ?", (intermediate_url,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def documents(self):
+        """Returns every manifest row as a dict."""
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM documents ORDER BY title").fetchall()
+        return [dict(row) for row in rows]
+
+    def conditional_headers(self, intermediate_url, pdf_url):
+        """Returns If-None-Match/If-Modified-Since for an unchanged local copy, else {}."""
+        entry = self.get(intermediate_url)
+        if not entry or canonical_url(entry["pdf_url"]) != canonical_url(pdf_url) or not os.path.exists(entry["file_path"] or ""):
+            return {}
+        headers = {}
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def record(self, intermediate_url, title, pdf_url, file_path, etag, last_modified, size, sha256):
+        """Inserts or replaces the row of a freshly downloaded document."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (intermediate_url, title, pdf_url, file_path, etag, last_modified, size, sha256, _now()),
+            )
+
+    def touch(self, intermediate_url):
+        """Marks a document as checked and unchanged."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE documents SET last_checked = ? WHERE intermediate_url = ?",
+                (_now(), intermediate_url),
+            )
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,167 @@
+import os
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+PROMETHEUS_PREFIX = "nist_"
+
+def _percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def _write_atomic(path, text):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        file.write(text)
+    os.replace(tmp_path, path)
+
+class RunMetrics:
+    """Per-run stage timings, bytes and labelled counters for the NIST pipeline.
+
+    Stages are timed with `timed(stage)`; counters cover HTTP statuses,
+    retries, page-cache hits, documents and connections. Pass `trace` (sync)
+    or `atrace` (async) as the httpx "trace" extension to count requests
+    and newly opened connections, which gives the connection reuse ratio.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Starts a new run: clears everything and restarts the run clock."""
+        with self._lock:
+            self.started = time.time()
+            self._durations = {}
+            self._bytes = {}
+            self._counters = {}
+
+    def observe(self, stage, seconds, nbytes=0):
+        with self._lock:
+            self._durations.setdefault(stage, []).append(seconds)
+            self._bytes[stage] = self._bytes.get(stage, 0) + nbytes
+
+    @contextmanager
+    def timed(self, stage):
+        """Times the block as one `stage` observation; set `.bytes` on the yielded record."""
+        record = SimpleNamespace(bytes=0)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            self.observe(stage, time.perf_counter() - start, record.bytes)
+
+    def increment(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def response(self, stage, status_code):
+        self.increment("http_responses", stage=stage, code=str(status_code))
+
+    def record_retry(self, url, error):
+        """RequestPolicy.on_retry hook: counts retries by status code or error type."""
+        response = getattr(error, "response", None)
+        self.increment("retries", reason=str(response.status_code) if response is not None else type(error).__name__)
+
+    def trace(self, event, info):
+        if event == "connection.connect_tcp.complete":
+            self.increment("connections_opened")
+        elif event.endswith(".send_request_headers.started"):
+            self.increment("requests")
+
+    async def atrace(self, event, info):
+        self.trace(event, info)
+
+    def counter(self, name, **labels):
+        with self._lock:
+            return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def summary(self):
+        """Per-stage count/total/p50/p90/p99/max seconds and bytes, plus counters."""
+        with self._lock:
+            durations = {stage: sorted(values) for stage, values in self._durations.items()}
+            stage_bytes = dict(self._bytes)
+            counters = dict(self._counters)
+        stages = {
+            stage: {
+                "count": len(values),
+                "total_s": round(sum(values), 4),
+                "p50_s": round(_percentile(values, 0.5), 4),
+                "p90_s": round(_percentile(values, 0.9), 4),
+                "p99_s": round(_percentile(values, 0.99), 4),
+                "max_s": round(values[-1], 4),
+                "bytes": stage_bytes.get(stage, 0),
+            }
+            for stage, values in durations.items()
+        }
+        counter_list = [{"name": name, "labels": dict(labels), "value": value} for (name, labels), value in sorted(counters.items())]
+        requests = sum(value for (name, _), value in counters.items() if name == "requests")
+        opened = sum(value for (name, _), value in counters.items() if name == "connections_opened")
+        return {
+            "started": datetime.fromtimestamp(self.started, timezone.utc).isoformat(timespec="seconds"),
+            "duration_s": round(time.time() - self.started, 3),
+            "stages": stages,
+            "counters": counter_list,
+            "connection_reuse_ratio": round(1 - opened / requests, 3) if requests else None,
+        }
+
+    def describe(self):
+        stages = self.summary()["stages"]
+        return ", ".join(
+            f"{stage} {s['count']}x p50 {s['p50_s'] * 1000:.0f} ms (total {s['total_s']:.1f}s)"
+            for stage, s in sorted(stages.items(), key=lambda item: -item[1]["total_s"])
+        )
+
+    def prometheus_text(self, summary=None):
+        """Renders the run in the Prometheus text exposition format."""
+        summary = summary or self.summary()
+        lines = [
+            f"# HELP {PROMETHEUS_PREFIX}stage_duration_seconds Time spent per pipeline stage in the last run.",
+            f"# TYPE {PROMETHEUS_PREFIX}stage_duration_seconds summary",
+        ]
+        for stage, s in sorted(summary["stages"].items()):
+            for quantile, key in (("0.5", "p50_s"), ("0.9", "p90_s"), ("0.99", "p99_s")):
+                lines.append(f'{PROMETHEUS_PREFIX}stage_duration_seconds{{stage="{stage}",quantile="{quantile}"}} {s[key]}')
+            lines.append(f'{PROMETHEUS_PREFIX}stage_duration_seconds_sum{{stage="{stage}"}} {s["total_s"]}')
+            lines.append(f'{PROMETHEUS_PREFIX}stage_duration_seconds_count{{stage="{stage}"}} {s["count"]}')
+        lines += [
+            f"# HELP {PROMETHEUS_PREFIX}stage_bytes_total Bytes moved per pipeline stage in the last run.",
+            f"# TYPE {PROMETHEUS_PREFIX}stage_bytes_total counter",
+        ]
+        lines += [f'{PROMETHEUS_PREFIX}stage_bytes_total{{stage="{stage}"}} {s["bytes"]}' for stage, s in sorted(summary["stages"].items())]
+        typed = set()
+        for counter in summary["counters"]:
+            metric = f"{PROMETHEUS_PREFIX}{counter['name']}_total"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            labels = ",".join(f'{key}="{value}"' for key, value in counter["labels"].items())
+            lines.append(f"{metric}{{{labels}}} {counter['value']}" if labels else f"{metric} {counter['value']}")
+        lines += [
+            f"# TYPE {PROMETHEUS_PREFIX}run_duration_seconds gauge",
+            f"{PROMETHEUS_PREFIX}run_duration_seconds {summary['duration_s']}",
+            f"# TYPE {PROMETHEUS_PREFIX}run_completed_timestamp_seconds gauge",
+            f"{PROMETHEUS_PREFIX}run_completed_timestamp_seconds {time.time():.0f}",
+        ]
+        if summary["connection_reuse_ratio"] is not None:
+            lines += [
+                f"# TYPE {PROMETHEUS_PREFIX}connection_reuse_ratio gauge",
+                f"{PROMETHEUS_PREFIX}connection_reuse_ratio {summary['connection_reuse_ratio']}",
+            ]
+        return "\n".join(lines) + "\n"
+
+    def export(self, textfile, summary_dir):
+        """Writes the Prometheus textfile (replaced atomically) and a per-run JSON summary."""
+        summary = self.summary()
+        if textfile:
+            _write_atomic(textfile, self.prometheus_text(summary))
+        if summary_dir:
+            name = datetime.fromtimestamp(self.started).strftime("run-%Y%m%d-%H%M%S.json")
+            _write_atomic(os.path.join(summary_dir, name), json.dumps(summary, indent=2))
+        logging.info(f"Stage timings: {self.describe()}")
+        return summary
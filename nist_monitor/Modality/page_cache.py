@@ -0,0 +1,81 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from .html_extract import parse_intermediate_page
+
+class PageCache:
+    """Fetch-once cache of parsed intermediate pages, keyed by URL.
+
+    Entries live in memory for the run. When cache_dir is set, each entry is
+    also kept on disk with the page's ETag/Last-Modified so the next run can
+    revalidate it with a conditional GET and reuse the parse on a 304.
+
+    The cache does no I/O over the network itself; callers look up an entry,
+    send `conditional_headers(url)` on a miss and hand the response to `update`.
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _disk_path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode()).hexdigest() + ".json")
+
+    def _load_disk(self, url):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._disk_path(url), "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _save_disk(self, url, entry):
+        if not self.cache_dir:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._disk_path(url)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(entry, file)
+        os.replace(tmp_path, path)
+
+    def get(self, url):
+        """Returns the entry already fetched this run, or None."""
+        with self._lock:
+            return self._entries.get(url)
+
+    def seed(self, entries):
+        """Adds entries resolved earlier ({url: entry}, e.g. by a plan) to this run's cache."""
+        with self._lock:
+            self._entries.update(entries)
+
+    def conditional_headers(self, url):
+        """Returns If-None-Match/If-Modified-Since headers from the disk tier."""
+        entry = self._load_disk(url)
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def update(self, url, status_code, headers, text):
+        """Stores a fetched page (200) or revives the disk entry (304); returns it."""
+        if status_code == 304:
+            entry = self._load_disk(url)
+            if entry is None:
+                raise ValueError(f"Got 304 for {url} without a cached copy")
+            logging.debug(f"Page not modified, using cached parse: {url}")
+        else:
+            entry = parse_intermediate_page(text)
+            entry["url"] = url
+            entry["etag"] = headers.get("etag")
+            entry["last_modified"] = headers.get("last-modified")
+            self._save_disk(url, entry)
+        with self._lock:
+            self._entries[url] = entry
+        return entry
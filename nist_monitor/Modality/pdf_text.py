@@ -0,0 +1,116 @@
+import os
+import re
+import time
+import logging
+import importlib.util
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+ABSTRACT_PAGES = 12  # SP front matter (title, authority, abstract) fits in these
+SUMMARY_PAGES = 20  # Pages the fallback summary draws sentences from
+SUMMARY_SENTENCES = 3
+SUMMARY_CHARS = 1200
+
+# Headings that end the Abstract section of an SP's front matter
+ABSTRACT_END = re.compile(
+    r"^\s*(?:keywords?|key words|audience|acknowledg\w*|table of contents|contents|"
+    r"note to reviewers|trademark information|executive summary|1\.?\s+introduction)\b",
+    re.I | re.M,
+)
+ABSTRACT_START = re.compile(r"^\s*abstract\s*$", re.I | re.M)
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z(])")
+WORD = re.compile(r"[a-z][a-z-]{3,}")
+STOPWORDS = set("""
+    this that with from have been were which their there these those into such
+    also than then they them will would should could shall must more most other
+    only upon when where while about after before under over each used using
+    within without between through document publication special nist page
+""".split())
+
+def pdf_text_available():
+    """True when pypdf, which PDF text extraction uses, is installed."""
+    return importlib.util.find_spec("pypdf") is not None
+
+def extract_pages(path):
+    """Returns the text of each page of a PDF, in order."""
+    from pypdf import PdfReader  # Optional dependency, only needed for PDF text
+    logging.getLogger("pypdf").setLevel(logging.ERROR)  # Malformed-PDF chatter
+    reader = PdfReader(path)
+    if reader.is_encrypted:
+        reader.decrypt("")  # NIST PDFs are at most owner-password protected
+    pages = []
+    for page in reader.pages:
+        try:
+            pages.append(page.extract_text() or "")
+        except Exception as e:
+            logging.debug(f"Skipping unreadable page {len(pages) + 1} of {path}: {e}")
+            pages.append("")
+    return pages
+
+def _clean(text):
+    text = re.sub(r"(\w)-\n(\w)", r"\1\2", text)  # Words hyphenated across lines
+    return re.sub(r"\s+", " ", text).strip()
+
+def _truncate(text, limit=SUMMARY_CHARS):
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    end = max(cut.rfind(". "), cut.rfind(".”"))
+    return cut[:end + 1] if end > limit // 2 else cut.rsplit(" ", 1)[0] + " ..."
+
+def find_abstract(pages):
+    """Returns the Abstract section from the front matter, or None."""
+    text = "\n".join(pages[:ABSTRACT_PAGES])
+    start = ABSTRACT_START.search(text)
+    if not start:
+        return None
+    end = ABSTRACT_END.search(text, start.end())
+    abstract = _clean(text[start.end():end.start() if end else start.end() + 4 * SUMMARY_CHARS])
+    return _truncate(abstract) if len(abstract) > 80 else None
+
+def extractive_summary(pages, sentences=SUMMARY_SENTENCES):
+    """Picks the sentences whose words are most frequent in the document's opening pages."""
+    candidates = [
+        sentence for sentence in SENTENCE_END.split(_clean("\n".join(pages[:SUMMARY_PAGES])))
+        if 60 <= len(sentence) <= 400 and sum(c.isalpha() for c in sentence) > 0.7 * len(sentence)
+    ]
+    if not candidates:
+        return None
+    frequency = Counter(word for sentence in candidates for word in WORD.findall(sentence.lower()) if word not in STOPWORDS)
+
+    def score(sentence):
+        words = [word for word in WORD.findall(sentence.lower()) if word not in STOPWORDS]
+        return sum(frequency[word] for word in words) / (len(words) + 5)
+
+    best = sorted(sorted(range(len(candidates)), key=lambda i: score(candidates[i]), reverse=True)[:sentences])
+    return _truncate(" ".join(candidates[i] for i in best))
+
+def analyze(path):
+    """Extracts a PDF's page text and summary; runs in a worker process.
+
+    Returns a dict with pages, summary (the Abstract, else an extractive
+    summary, else None), error and seconds. Never raises, so one bad PDF
+    can't break the pool.
+    """
+    start = time.perf_counter()
+    try:
+        pages = extract_pages(path)
+        summary = find_abstract(pages) or extractive_summary(pages)
+        error = None
+    except Exception as e:
+        pages, summary, error = [], None, f"{type(e).__name__}: {e}"
+    return {"pages": pages, "summary": summary, "error": error, "seconds": time.perf_counter() - start}
+
+def start_pool(workers=None):
+    """Starts the PDF worker processes, or returns None when pypdf is missing.
+
+    Call this before the download threads start: where processes are
+    forked, ProcessPoolExecutor launches every worker on the first submit,
+    so the warm-up task forks them while the parent is still single-threaded.
+    """
+    if not pdf_text_available():
+        logging.warning("pypdf is not installed; PDFs won't be summarized or indexed (pip install pypdf)")
+        return None
+    pool = ProcessPoolExecutor(workers or os.cpu_count())
+    pool.submit(int).result()
+    return pool
@@ -0,0 +1,115 @@
+import os
+import json
+import time
+import logging
+from datetime import datetime, timezone
+from .store import canonical_url
+
+STATUSES = ("new", "changed", "unchanged", "unresolved", "failed")
+
+def classify(entry, pdf_url, headers):
+    """Compares a PDF's HEAD response headers with its manifest entry.
+
+    Returns (status, size). A document is "new" when there's no local copy,
+    "unchanged" when the validators the next sync run would send still match,
+    and "changed" otherwise, including when the server gives nothing to
+    compare (the run will fetch it). size is the Content-Length, or None.
+    """
+    length = headers.get("content-length")
+    size = int(length) if length and length.isdigit() else None
+    if not entry or not os.path.exists(entry["file_path"] or ""):
+        return "new", size
+    if canonical_url(entry["pdf_url"]) != canonical_url(pdf_url):
+        return "changed", size
+    if headers.get("etag") and entry["etag"]:
+        return ("unchanged" if headers["etag"] == entry["etag"] else "changed"), size
+    if headers.get("last-modified") and entry["last_modified"]:
+        return ("unchanged" if headers["last-modified"] == entry["last_modified"] else "changed"), size
+    if size is not None and entry["size"] is not None:
+        return ("unchanged" if size == entry["size"] else "changed"), size
+    return "changed", size
+
+def plan_entry(title, intermediate_url, status, pdf_url=None, size=None, page=None):
+    """One catalogue entry of a plan; page is its parsed intermediate page (page cache entry)."""
+    return {
+        "title": title,
+        "intermediate_url": intermediate_url,
+        "pdf_url": pdf_url,
+        "status": status,
+        "size": size,
+        "page": page,
+    }
+
+class RunPlan:
+    """The work set of a run, computed without downloading any PDF.
+
+    Holds every catalogue entry with its resolved PDF URL and its status
+    against the local copies. Saved as JSON so the next real run can take
+    the resolved intermediate pages from it instead of fetching them again.
+    """
+
+    def __init__(self, entries, created=None):
+        self.entries = sorted(entries, key=lambda entry: entry["title"])
+        self.created = created or time.time()
+
+    def totals(self):
+        totals = dict.fromkeys(STATUSES, 0)
+        totals.update(documents=len(self.entries), bytes=0, unknown_size=0)
+        for entry in self.entries:
+            totals[entry["status"]] += 1
+            if entry["status"] in ("new", "changed"):
+                if entry["size"] is None:
+                    totals["unknown_size"] += 1
+                else:
+                    totals["bytes"] += entry["size"]
+        return totals
+
+    def to_json(self):
+        return {
+            "created": datetime.fromtimestamp(self.created, timezone.utc).isoformat(timespec="seconds"),
+            "totals": self.totals(),
+            "entries": self.entries,
+        }
+
+    def save(self, path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(self.to_json(), file, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def pages(self):
+        """Returns the resolved intermediate pages, keyed by URL."""
+        return {entry["intermediate_url"]: entry["page"] for entry in self.entries if entry["page"]}
+
+    def describe(self):
+        totals = self.totals()
+        lines = [f"Plan for {totals['documents']} documents:"]
+        for status in STATUSES:
+            size = sum(entry["size"] or 0 for entry in self.entries if entry["status"] == status)
+            shown = f"  {size / (1024 * 1024):10.2f} MB" if status in ("new", "changed") else ""
+            lines.append(f"  {status:10} {totals[status]:6}{shown}")
+        unknown = f" ({totals['unknown_size']} without a Content-Length)" if totals["unknown_size"] else ""
+        lines.append(f"  to transfer: {totals['bytes'] / (1024 * 1024):.2f} MB{unknown}")
+        return "\n".join(lines)
+
+def load_plan(path, max_age):
+    """Returns the plan saved at path, or None when there is none younger than max_age seconds."""
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+    except (OSError, ValueError):
+        return None
+    created = datetime.fromisoformat(data["created"]).timestamp()
+    if time.time() - created > max_age:
+        return None
+    return RunPlan(data["entries"], created)
+
+def reuse_plan(page_cache, path, max_age):
+    """Seeds page_cache with the pages a recent plan resolved; returns how many."""
+    run_plan = load_plan(path, max_age)
+    if run_plan is None:
+        return 0
+    pages = run_plan.pages()
+    page_cache.seed(pages)
+    logging.info(f"Reusing {len(pages)} resolved pages from the plan of {datetime.fromtimestamp(run_plan.created):%Y-%m-%d %H:%M:%S}")
+    return len(pages)
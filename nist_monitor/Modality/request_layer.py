@@ -0,0 +1,137 @@
+import time
+import random
+import asyncio
+import logging
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+import httpx
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class TokenBucket:
+    """Token-bucket rate limiter; `reserve` returns how long to wait for a token.
+
+    Reservations may run the bucket negative, so concurrent callers queue up
+    behind each other instead of all waking at once.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+def retry_after_seconds(response):
+    """Parses a Retry-After header (seconds or HTTP date), or returns None."""
+    value = response.headers.get("retry-after") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+class RequestPolicy:
+    """Rate limits, retries and the retry budget shared by every NIST request.
+
+    Each request waits for a token from its host's bucket. A transport error or
+    retryable status is retried up to max_attempts times, after Retry-After if
+    the server sent one, else after exponential backoff with full jitter. The
+    retry budget caps retries across the whole run so an outage fails fast.
+    """
+
+    def __init__(self, rate_per_host=10.0, burst=20, max_attempts=4, base_delay=0.5,
+                 max_delay=30.0, retry_budget=50):
+        self.rate_per_host = rate_per_host
+        self.burst = burst
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_budget = retry_budget
+        self.retries = 0
+        self.on_retry = None  # Optional callback(url, error), e.g. for metrics
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """Starts a new run: a full retry budget and full token buckets."""
+        with self._lock:
+            self.retries = 0
+            self._buckets = {}
+
+    def _bucket(self, url):
+        host = urlsplit(url).hostname
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.rate_per_host, self.burst)
+            return self._buckets[host]
+
+    def retry_delay(self, attempt, error, retry_statuses=()):
+        """Seconds to wait before retrying after `error`, or None to give up."""
+        response = None
+        if isinstance(error, httpx.HTTPStatusError):
+            response = error.response
+            if response.status_code not in RETRY_STATUSES and response.status_code not in retry_statuses:
+                return None
+        elif not isinstance(error, httpx.TransportError):
+            return None
+        if attempt + 1 >= self.max_attempts:
+            return None
+        with self._lock:
+            if self.retries >= self.retry_budget:
+                logging.warning("Retry budget exhausted, not retrying further failures")
+                return None
+            self.retries += 1
+        delay = retry_after_seconds(response)
+        if delay is None:
+            delay = random.uniform(0, self.base_delay * 2 ** attempt)
+        return min(delay, self.max_delay)
+
+    def run(self, url, attempt_fn, retry_statuses=()):
+        """Calls attempt_fn() under the rate limit, retrying per the policy."""
+        attempt = 0
+        while True:
+            time.sleep(self._bucket(url).reserve())
+            try:
+                return attempt_fn()
+            except Exception as e:
+                delay = self.retry_delay(attempt, e, retry_statuses)
+                if delay is None:
+                    raise
+                if self.on_retry:
+                    self.on_retry(url, e)
+                logging.warning(f"Retrying {url} in {delay:.1f}s (attempt {attempt + 2}/{self.max_attempts}): {e}")
+                time.sleep(delay)
+                attempt += 1
+
+    async def run_async(self, url, attempt_fn, retry_statuses=()):
+        """Awaits attempt_fn() under the rate limit, retrying per the policy."""
+        attempt = 0
+        while True:
+            await asyncio.sleep(self._bucket(url).reserve())
+            try:
+                return await attempt_fn()
+            except Exception as e:
+                delay = self.retry_delay(attempt, e, retry_statuses)
+                if delay is None:
+                    raise
+                if self.on_retry:
+                    self.on_retry(url, e)
+                logging.warning(f"Retrying {url} in {delay:.1f}s (attempt {attempt + 2}/{self.max_attempts}): {e}")
+                await asyncio.sleep(delay)
+                attempt += 1
@@ -0,0 +1,86 @@
+import os
+import json
+import logging
+
+def part_path(file_path):
+    """Path of the partial download kept until the file is complete."""
+    return file_path + ".part"
+
+def _state_path(file_path):
+    return file_path + ".part.json"
+
+def load_state(file_path, url):
+    """Returns the resume state of a partial download of url, or None.
+
+    The offset is taken from the size of the .part file itself, so a sidecar
+    written just before a crash can never claim more bytes than are on disk.
+    """
+    try:
+        with open(_state_path(file_path), "r", encoding="utf-8") as file:
+            state = json.load(file)
+        offset = os.path.getsize(part_path(file_path))
+    except (OSError, ValueError):
+        return None
+    if state.get("url") != url or offset == 0:
+        return None
+    state["offset"] = offset
+    return state
+
+def resume_headers(state):
+    """Builds Range/If-Range headers, or {} when the partial can't be validated."""
+    if not state:
+        return {}
+    etag = state.get("etag")
+    # If-Range needs a strong validator; weak ETags fall back to Last-Modified
+    validator = etag if etag and not etag.startswith("W/") else state.get("last_modified")
+    if not validator:
+        return {}
+    return {"Range": f"bytes={state['offset']}-", "If-Range": validator}
+
+def start_offset(response, state):
+    """Returns the byte offset the response body starts at (0 = full body)."""
+    if not state or response.status_code != 206:
+        return 0
+    content_range = response.headers.get("content-range", "")
+    try:
+        start = int(content_range.split()[1].split("-")[0])
+    except (IndexError, ValueError):
+        start = -1
+    if start != state["offset"]:
+        raise ValueError(f"Unexpected Content-Range {content_range!r} for offset {state['offset']}")
+    return start
+
+def save_state(file_path, url, response):
+    """Records the validators of the response being written to the .part file."""
+    state = {
+        "url": url,
+        "etag": response.headers.get("etag"),
+        "last_modified": response.headers.get("last-modified"),
+    }
+    with open(_state_path(file_path), "w", encoding="utf-8") as file:
+        json.dump(state, file)
+
+def discard(file_path):
+    """Removes a partial download that can't be resumed."""
+    for path in (part_path(file_path), _state_path(file_path)):
+        if os.path.exists(path):
+            os.remove(path)
+    logging.debug(f"Discarded partial download of {file_path}")
+
+def discard_state(file_path):
+    """Removes only the sidecar of a partial download."""
+    if os.path.exists(_state_path(file_path)):
+        os.remove(_state_path(file_path))
+
+def hash_partial(file_path, digest, chunk_size=1024 * 1024):
+    """Feeds the bytes already in the .part file into a running hash."""
+    with open(part_path(file_path), "rb") as file:
+        for block in iter(lambda: file.read(chunk_size), b""):
+            digest.update(block)
+
+def partial_size(file_path):
+    """Bytes of the .part file kept for the next attempt (0 if none)."""
+    try:
+        return os.path.getsize(part_path(file_path))
+    except OSError:
+        return 0
@@ -0,0 +1,68 @@
+import os
+import argparse
+import logging
+import sys
+import time
+from .config import MANIFEST_FILE, SEARCH_INDEX_FILE, PDF_WORKERS
+from .logging_utils import setup_download_dir, setup_logging
+from .manifest import Manifest
+from .search_index import SearchIndex, update_index
+from .pdf_text import start_pool
+
+MAX_PAGES_SHOWN = 12
+
+def format_pages(pages):
+    shown = ", ".join(str(page) for page in pages[:MAX_PAGES_SHOWN])
+    return shown + (f" (+{len(pages) - MAX_PAGES_SHOWN} more)" if len(pages) > MAX_PAGES_SHOWN else "")
+
+def main(argv=None):
+    """Searches the index from the command line: python -m Modality.search QUERY"""
+    parser = argparse.ArgumentParser(description="Search the text of downloaded NIST SP publications.")
+    parser.add_argument("query", nargs="*", help='words to find, e.g. "800-53 control AC-2"; all must appear in the document')
+    parser.add_argument("--limit", type=int, default=10, help="documents to show")
+    parser.add_argument("--raw", action="store_true", help="pass the query to SQLite FTS5 as is (NEAR, OR, prefix*); matched page by page")
+    parser.add_argument("--update", action="store_true", help="index PDFs downloaded since the last update first")
+    args = parser.parse_args(argv)
+    if not args.query and not args.update:
+        parser.error("give a query, --update, or both")
+
+    if args.update:
+        setup_download_dir()
+        setup_logging()
+        pool = start_pool(PDF_WORKERS)
+        manifest = Manifest(MANIFEST_FILE)
+        try:
+            update_index(SEARCH_INDEX_FILE, manifest, pool)
+        finally:
+            manifest.close()
+            if pool:
+                pool.shutdown()
+    if not args.query:
+        return 0
+    if not os.path.exists(SEARCH_INDEX_FILE):
+        logging.error(f"No search index at {SEARCH_INDEX_FILE}; build it with --update")
+        return 1
+
+    index = SearchIndex(SEARCH_INDEX_FILE)
+    start = time.perf_counter()
+    try:
+        results = index.search(" ".join(args.query), args.limit, args.raw)
+    except Exception as e:  # sqlite3.OperationalError on malformed --raw syntax
+        logging.error(f"Search failed: {e}")
+        return 1
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        index.close()
+
+    print(f"{len(results)} document(s) in {elapsed_ms:.1f} ms")
+    for rank, hit in enumerate(results, 1):
+        titles = ", ".join(hit["titles"]) or hit["sha256"][:12]
+        print(f"\n{rank}. {titles}  (score {-hit['score']:.2f})")
+        print(f"   pages: {format_pages(hit['pages'])}")
+        print(f"   {hit['snippet']}")
+        if hit["file_path"]:
+            print(f"   {hit['file_path']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+import os
+import re
+import time
+import sqlite3
+import logging
+from datetime import datetime
+from .pdf_text import analyze, pdf_text_available
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contents (
+    sha256 TEXT PRIMARY KEY,
+    pages INTEGER,
+    indexed_at TEXT,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS names (
+    file_path TEXT PRIMARY KEY,
+    sha256 TEXT,
+    title TEXT,
+    intermediate_url TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS pages USING fts5(
+    text, sha256 UNINDEXED, page UNINDEXED, tokenize = 'porter unicode61'
+);
+"""
+
+def to_fts_terms(text):
+    """Turns free text into one FTS5 query per word.
+
+    Each whitespace-separated word is quoted, so "800-53" and "AC-2" match as
+    phrases ("800 53", "ac 2") instead of being read as FTS5 operators.
+    """
+    words = [word.replace('"', "") for word in text.split()]
+    return [f'"{word}"' for word in words if re.search(r"\w", word)]
+
+class SearchIndex:
+    """SQLite FTS5 index of the text of every downloaded PDF, one row per page.
+
+    Text is keyed by content SHA-256, so a PDF saved under several titles is
+    read once and re-downloads of an unchanged file cost nothing. `update`
+    only extracts content it hasn't seen and drops content no longer named
+    by the manifest; it never rebuilds the whole index. The download
+    pipeline adds each new PDF as its text arrives from the PDF stage.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # Used from the pipeline's record stage; one thread at a time
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+
+    def update(self, documents, pool=None):
+        """Brings the index in line with the manifest rows in `documents`.
+
+        New PDFs are read through `pool` (a ProcessPoolExecutor) when given.
+        Returns (added, removed) counts of distinct PDFs.
+        """
+        documents = [doc for doc in documents if doc["sha256"] and os.path.exists(doc["file_path"] or "")]
+        known = {row["sha256"] for row in self._conn.execute("SELECT sha256 FROM contents")}
+        paths = {}
+        for doc in documents:
+            paths.setdefault(doc["sha256"], doc["file_path"])
+
+        missing = [(sha256, path) for sha256, path in paths.items() if sha256 not in known]
+        results = (pool.map if pool else map)(analyze, [path for _, path in missing])
+        for (sha256, path), result in zip(missing, results):
+            if result["error"]:
+                logging.warning(f"Could not extract text from {path}: {result['error']}")
+            self.add(sha256, result["pages"], result["error"])
+
+        stale = known - paths.keys()
+        with self._conn:
+            self._conn.execute("DELETE FROM names")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO names VALUES (?, ?, ?, ?)",
+                [(doc["file_path"], doc["sha256"], doc["title"], doc["intermediate_url"]) for doc in documents],
+            )
+            for sha256 in stale:
+                self._conn.execute("DELETE FROM pages WHERE sha256 = ?", (sha256,))
+                self._conn.execute("DELETE FROM contents WHERE sha256 = ?", (sha256,))
+        return len(missing), len(stale)
+
+    def add(self, sha256, pages, error=None):
+        """Indexes one PDF's page text, in one transaction.
+
+        Unreadable PDFs are recorded with their error so they aren't retried
+        every run; they come back when their content (and so hash) changes.
+        """
+        with self._conn:
+            self._conn.execute("DELETE FROM pages WHERE sha256 = ?", (sha256,))
+            self._conn.executemany(
+                "INSERT INTO pages (text, sha256, page) VALUES (?, ?, ?)",
+                [(text, sha256, number) for number, text in enumerate(pages, 1) if text.strip()],
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO contents VALUES (?, ?, ?, ?)",
+                (sha256, len(pages), datetime.now().strftime("%Y-%m-%d %H:%M:%S"), error),
+            )
+
+    def search(self, query, limit=10, raw=False):
+        """Ranks documents for a query; returns dicts with titles, matching pages and a snippet.
+
+        A document matches when every word appears on some page of it; each
+        word is matched separately. Its score is the sum of the BM25 scores of
+        the pages each word matched (lower is better, as in FTS5). With
+        raw=True the query is passed to FTS5 unchanged as one MATCH, so NEAR,
+        OR, prefix* and column filters work, within a page.
+        """
+        matches = [query] if raw else to_fts_terms(query)
+        if not matches:
+            return []
+        hits = None
+        for match in matches:
+            found = {}
+            rows = self._conn.execute(
+                "SELECT sha256, page, bm25(pages) AS score, snippet(pages, 0, '[', ']', ' ... ', 12) AS snippet "
+                "FROM pages WHERE pages MATCH ? ORDER BY score",
+                (match,),
+            )
+            for row in rows:
+                hit = found.setdefault(row["sha256"], {"sha256": row["sha256"], "score": 0.0, "pages": set(), "snippet": row["snippet"], "best": row["score"]})
+                hit["score"] += row["score"]
+                hit["pages"].add(row["page"])
+            if hits is None:
+                hits = found
+                continue
+            for sha256 in list(hits):
+                if sha256 not in found:
+                    del hits[sha256]
+                    continue
+                hit, other = hits[sha256], found[sha256]
+                hit["score"] += other["score"]
+                hit["pages"] |= other["pages"]
+                if other["best"] < hit["best"]:  # The snippet of the best-scoring page
+                    hit["snippet"], hit["best"] = other["snippet"], other["best"]
+            if not hits:
+                break
+        ranked = sorted(hits.values(), key=lambda hit: hit["score"])[:limit]
+        for hit in ranked:
+            names = self._conn.execute(
+                "SELECT title, file_path FROM names WHERE sha256 = ? ORDER BY title", (hit["sha256"],)
+            ).fetchall()
+            hit["titles"] = [name["title"] for name in names]
+            hit["file_path"] = names[0]["file_path"] if names else None
+            hit["pages"] = sorted(hit["pages"])
+            del hit["best"]
+        return ranked
+
+    def stats(self):
+        row = self._conn.execute(
+            "SELECT COUNT(*) AS documents, COALESCE(SUM(pages), 0) AS pages, COUNT(error) AS errors FROM contents"
+        ).fetchone()
+        return dict(row)
+
+    def close(self):
+        self._conn.close()
+
+def update_index(index_path, manifest, pool=None):
+    """Indexes newly downloaded PDFs; logs and skips when pypdf isn't installed.
+
+    With a process pool the PDFs are read in parallel.
+    """
+    if not pdf_text_available():
+        logging.warning("pypdf is not installed; the search index was not updated (pip install pypdf)")
+        return None
+    start = time.perf_counter()
+    index = SearchIndex(index_path)
+    try:
+        added, removed = index.update(manifest.documents(), pool)
+        stats = index.stats()
+    finally:
+        index.close()
+    logging.info(
+        f"Search index: {added} PDF(s) added, {removed} removed in {time.perf_counter() - start:.1f}s "
+        f"({stats['documents']} indexed, {stats['pages']} pages)"
+    )
+    return added, removed
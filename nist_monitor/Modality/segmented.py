@@ -0,0 +1,76 @@
+import os
+import hashlib
+
+def validator(response):
+    """Strong ETag or Last-Modified usable in If-Range, or None."""
+    etag = response.headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("last-modified")
+
+def plan(response, offset, threshold, max_segments):
+    """Byte ranges to fetch in parallel, or None to keep the single stream.
+
+    Only a fresh (non-resumed), uncompressed 200 response of at least
+    `threshold` bytes from a server that accepts byte ranges is split.
+    """
+    if response.status_code != 200 or offset or max_segments < 2:
+        return None
+    if response.headers.get("accept-ranges", "").lower() != "bytes":
+        return None
+    if response.headers.get("content-encoding", "identity") != "identity" or not validator(response):
+        return None
+    size = int(response.headers.get("content-length") or 0)
+    if size < threshold:
+        return None
+    count = min(max_segments, -(-size // max(1, threshold // 2)))
+    step = -(-size // count)
+    return [(start, min(start + step, size) - 1) for start in range(0, size, step)]
+
+def range_headers(start, end, validator_value):
+    """Headers for one segment; If-Range makes a changed file fail the segment."""
+    return {
+        "Range": f"bytes={start}-{end}",
+        "If-Range": validator_value,
+        "Accept-Encoding": "identity",
+    }
+
+def check_segment(response, start, end, etag):
+    """Raises ValueError unless the response is exactly the requested range of the same file."""
+    if response.status_code != 206:
+        raise ValueError(f"Segment {start}-{end} got status {response.status_code}; the file changed or ranges are unsupported")
+    content_range = response.headers.get("content-range", "")
+    if not content_range.startswith(f"bytes {start}-{end}/"):
+        raise ValueError(f"Segment {start}-{end} got Content-Range {content_range!r}")
+    if etag and response.headers.get("etag") not in (None, etag):
+        raise ValueError(f"Segment {start}-{end} came from a different version of the file")
+
+def preallocate(path, size):
+    """Opens path for positional writes with `size` bytes reserved; returns the fd."""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.posix_fallocate(fd, 0, size)
+    except (AttributeError, OSError):
+        os.ftruncate(fd, size)  # No fallocate (e.g. macOS): a sparse file of the final size
+    return fd
+
+def write_chunk(fd, chunk, position, end):
+    """Writes the part of chunk that falls inside the segment; returns bytes written."""
+    chunk = chunk[:end + 1 - position]
+    os.pwrite(fd, chunk, position)
+    return len(chunk)
+
+def check_complete(start, end, position):
+    if position != end + 1:
+        raise ValueError(f"Segment {start}-{end} ended at byte {position}")
+
+def verify(path, size, chunk_size=1024 * 1024):
+    """Checks the assembled file's size and returns its sha256 hex digest."""
+    actual = os.path.getsize(path)
+    if actual != size:
+        raise ValueError(f"Assembled file is {actual} bytes, expected {size}")
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,70 @@
+import os
+import stat
+import logging
+import posixpath
+from urllib.parse import urlsplit, urlunsplit, quote, unquote
+
+def canonical_url(url):
+    """Normalizes a PDF URL so equivalent links compare equal.
+
+    http/https, host case, default ports, dot segments, duplicate slashes,
+    percent-encoding and fragments don't distinguish two documents.
+    """
+    parts = urlsplit(url.strip())
+    scheme = "https" if parts.scheme.lower() in ("http", "https") else parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    netloc = host if parts.port in (None, 80, 443) else f"{host}:{parts.port}"
+    path = posixpath.normpath("/" + unquote(parts.path).lstrip("/")) if parts.path else "/"
+    return urlunsplit((scheme, netloc, quote(path, safe="/:@-._~!$&'()*+,;="), parts.query, ""))
+
+class ContentStore:
+    """Content-addressed PDF store: objects/<ab>/<sha256>.pdf plus named links.
+
+    Each distinct file is kept once, read-only, under its SHA-256; the
+    human-readable {title}.pdf names in the download directory are hardlinks
+    to it (or symlinks where hardlinks aren't possible).
+    """
+
+    def __init__(self, root, link_mode="hardlink"):
+        self.root = root
+        self.link_mode = link_mode
+
+    def object_path(self, sha256):
+        return os.path.join(self.root, sha256[:2], f"{sha256}.pdf")
+
+    def has(self, sha256):
+        return bool(sha256) and os.path.exists(self.object_path(sha256))
+
+    def commit(self, source_path, sha256, name_path):
+        """Moves a finished download into the store and links name_path to it.
+
+        Returns True when the content was already stored (the source is dropped).
+        """
+        object_path = self.object_path(sha256)
+        duplicate = os.path.exists(object_path)
+        if duplicate:
+            os.remove(source_path)
+        else:
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            os.replace(source_path, object_path)
+            os.chmod(object_path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        self.link(sha256, name_path)
+        return duplicate
+
+    def link(self, sha256, name_path):
+        """Points name_path at the stored object, replacing whatever was there."""
+        object_path = self.object_path(sha256)
+        if os.path.exists(name_path) and os.path.samefile(object_path, name_path):
+            return
+        tmp_path = f"{name_path}.link-tmp"
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+        if self.link_mode == "hardlink":
+            try:
+                os.link(object_path, tmp_path)
+            except OSError as e:
+                logging.debug(f"Hardlink failed ({e}), using a symlink for {name_path}")
+                os.symlink(os.path.relpath(object_path, os.path.dirname(name_path)), tmp_path)
+        else:
+            os.symlink(os.path.relpath(object_path, os.path.dirname(name_path)), tmp_path)
+        os.replace(tmp_path, name_path)
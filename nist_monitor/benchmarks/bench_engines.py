@@ -0,0 +1,171 @@
+"""End-to-end benchmark of the NIST downloaders against the local stand-in server.
+
+Every engine downloads the full synthetic catalogue in its own process, with
+HOME pointed at a scratch directory (so runs start cold and never touch the
+real download folder) and BASE_URL pointed at stand_in_server.py.
+
+Reported per engine: documents/s and MB/s over the engine's wall time,
+p50/p99 per-document latency (first page request to last PDF byte, timed by
+the server) and the peak RSS of the engine process.
+
+    python benchmarks/bench_engines.py --docs 40 --pdf-size 1
+    python benchmarks/bench_engines.py --latency 0.08 --bandwidth 4 --error-rate 0.05
+    python benchmarks/bench_engines.py --http2 --engines async,threads
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+import resource
+import subprocess
+import importlib
+import importlib.util
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+NIST_DIR = os.path.dirname(HERE)
+REPO_DIR = os.path.dirname(NIST_DIR)
+sys.path.insert(0, HERE)
+import stand_in_server
+
+# The Modality package's two engines, and the archived scripts as baselines
+ENGINES = {
+    "async": "Modality.async_downloader",
+    "threads": "Modality.downloader",
+    "nist_6.0": os.path.join(REPO_DIR, "Archive", "nist_6.0.py"),
+    "nist_5.0": os.path.join(REPO_DIR, "Archive", "nist_5.0.py"),
+}
+RESULT_MARKER = "BENCH_RESULT "
+# Post-download stages the older engines lack; off so every engine is timed on downloading alone
+DOWNLOAD_ONLY = {"ANALYZE_PDFS": False, "UPDATE_SEARCH_INDEX": False}
+
+def run_engine(name, base_url):
+    """Child side: runs one engine against base_url and prints its timings."""
+    target = ENGINES[name]
+    if target.startswith("Modality."):
+        sys.path.insert(0, NIST_DIR)
+        module = importlib.import_module(target)
+        from Modality import data_extraction
+        data_extraction.BASE_URL = base_url
+        if hasattr(module, "async_download_all_pdfs"):
+            main = lambda: asyncio.run(module.async_download_all_pdfs())
+        else:
+            main = module.download_all_pdfs
+    else:
+        spec = importlib.util.spec_from_file_location(name.replace(".", "_"), target)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        main = module.download_all_pdfs
+    module.BASE_URL = base_url
+    module.SP_PAGE_URL = base_url + "/publications/sp"
+    module.LIMIT_DOWNLOADS = False
+    for setting, value in DOWNLOAD_ONLY.items():
+        if hasattr(module, setting):
+            setattr(module, setting, value)
+
+    start = time.perf_counter()
+    main()
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    print(RESULT_MARKER + json.dumps({"elapsed": elapsed, "peak_rss": peak_rss}), flush=True)
+
+def bench_engine(name, stand_in, env, timeout):
+    """Parent side: runs one engine in a subprocess and returns its report row."""
+    home = tempfile.mkdtemp(prefix=f"bench-{name}-")
+    stand_in.reset()
+    try:
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--run-engine", name, "--base-url", stand_in.base_url],
+            env={**env, "HOME": home},
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+        output = completed.stdout
+        error = (completed.stderr.strip().splitlines() or ["no output"])[-1]
+    except subprocess.TimeoutExpired:
+        output, error = "", f"timed out after {timeout}s"
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+    result = next((json.loads(line[len(RESULT_MARKER):]) for line in output.splitlines() if line.startswith(RESULT_MARKER)), None)
+    if result is None:
+        return {"engine": name, "error": error}
+    stats = stand_in.stats()
+    elapsed = result["elapsed"]
+    return {
+        "engine": name,
+        "documents": stats["documents"],
+        "elapsed_s": round(elapsed, 2),
+        "docs_per_s": round(stats["documents"] / elapsed, 2),
+        "mb_per_s": round(stats["pdf_bytes"] / elapsed / (1024 * 1024), 2),
+        "p50_s": stand_in_server.percentile(stats["latencies"], 0.5),
+        "p99_s": stand_in_server.percentile(stats["latencies"], 0.99),
+        "peak_rss_mb": round(result["peak_rss"] / (1024 * 1024), 1),
+        "requests": stats["requests"],
+        "errors_injected": stats["errors_injected"],
+    }
+
+def print_report(rows, total_docs):
+    print(f"{'engine':<10} {'docs':>7} {'time (s)':>9} {'docs/s':>7} {'MB/s':>7} {'p50 (s)':>8} {'p99 (s)':>8} {'RSS (MB)':>9} {'503s':>5}")
+    for row in rows:
+        if "error" in row:
+            print(f"{row['engine']:<10} failed: {row['error']}")
+            continue
+        print(
+            f"{row['engine']:<10} {row['documents']:>3}/{total_docs:<3} {row['elapsed_s']:>9.2f} {row['docs_per_s']:>7.2f} "
+            f"{row['mb_per_s']:>7.2f} {row['p50_s'] or 0:>8.2f} {row['p99_s'] or 0:>8.2f} {row['peak_rss_mb']:>9.1f} {row['errors_injected']:>5}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    stand_in_server.add_server_arguments(parser)
+    parser.add_argument("--engines", default=",".join(ENGINES), help="comma-separated subset of: " + ", ".join(ENGINES))
+    parser.add_argument("--timeout", type=int, default=600, help="seconds before an engine run is abandoned")
+    parser.add_argument("--json", metavar="PATH", help="also write the results to PATH")
+    parser.add_argument("--run-engine", help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run_engine:
+        run_engine(args.run_engine, args.base_url)
+        return
+
+    engines = [name.strip() for name in args.engines.split(",") if name.strip()]
+    unknown = [name for name in engines if name not in ENGINES]
+    if unknown:
+        parser.error(f"unknown engine(s): {', '.join(unknown)}")
+    stand_in_server.check_server_arguments(parser, args)
+
+    stand_in = stand_in_server.stand_in_from_args(args)
+    with tempfile.TemporaryDirectory() as cert_dir:
+        env = dict(os.environ)
+        certificate = None
+        if args.tls or args.http2:
+            certificate = stand_in_server.make_certificate(cert_dir)
+            env["SSL_CERT_FILE"] = certificate[0]
+        stop = stand_in_server.serve(stand_in, certificate=certificate, http2=args.http2)
+        protocol = "HTTP/2" if args.http2 else "HTTP/1.1" + (" over TLS" if certificate else "")
+        print(
+            f"Stand-in at {stand_in.base_url} ({protocol}): {args.docs} documents of {args.pdf_size} MB, "
+            f"latency {args.latency}s, bandwidth {args.bandwidth or 'unlimited'} MB/s, error rate {args.error_rate}\n"
+        )
+        try:
+            rows = []
+            for name in engines:
+                print(f"Running {name}...", flush=True)
+                rows.append(bench_engine(name, stand_in, env, args.timeout))
+        finally:
+            stop()
+
+    print()
+    print_report(rows, args.docs)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump({"settings": vars(args), "results": rows}, file, indent=2)
+
+if __name__ == "__main__":
+    main()
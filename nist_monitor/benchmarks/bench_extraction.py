@@ -0,0 +1,93 @@
+"""Micro-benchmark of the HTML extraction backends in Modality/html_extract.py.
+
+Runs every backend over the saved page fixtures, checks that each one returns
+exactly what the bs4 reference returns, and prints the time per page.
+
+    python benchmarks/bench_extraction.py            # saved fixtures, else synthetic pages
+    python benchmarks/bench_extraction.py --save 20  # capture the live listing + 20 SP pages first
+"""
+import os
+import sys
+import glob
+import time
+import argparse
+import statistics
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+from Modality import html_extract
+import synthetic_nist
+
+FIXTURE_DIR = os.path.join(HERE, "fixtures")
+BASE_URL = "https://csrc.nist.gov"
+
+def save_fixtures(count):
+    """Saves the live SP listing and `count` intermediate pages as fixtures."""
+    import httpx
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    with httpx.Client(http2=True, timeout=30, follow_redirects=True) as client:
+        listing = client.get(BASE_URL + "/publications/sp").text
+        with open(os.path.join(FIXTURE_DIR, "listing.html"), "w", encoding="utf-8") as file:
+            file.write(listing)
+        links = list(html_extract.extract_intermediate_links(listing, BASE_URL).values())[:count]
+        for i, url in enumerate(links):
+            with open(os.path.join(FIXTURE_DIR, f"page_{i:03d}.html"), "w", encoding="utf-8") as file:
+                file.write(client.get(url).text)
+    print(f"Saved listing and {len(links)} pages to {FIXTURE_DIR}")
+
+def load_fixtures():
+    """Returns (listings, pages, source) from FIXTURE_DIR or synthetic pages."""
+    def read(pattern):
+        paths = sorted(glob.glob(os.path.join(FIXTURE_DIR, pattern)))
+        return [open(path, encoding="utf-8").read() for path in paths]
+
+    listings, pages = read("listing*.html"), read("page_*.html")
+    if listings and pages:
+        return listings, pages, f"saved fixtures in {FIXTURE_DIR}"
+    docs = synthetic_nist.document_ids(1500)
+    listings = [synthetic_nist.listing_page(docs)]
+    pages = [synthetic_nist.intermediate_page(doc) for doc in docs[:50]]
+    return listings, pages, "synthetic pages (run with --save to capture real ones)"
+
+def time_per_call(func, inputs, repeat):
+    """Median seconds per input over `repeat` passes."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in inputs:
+            func(item)
+        samples.append((time.perf_counter() - start) / len(inputs))
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--save", type=int, metavar="N", help="capture live fixtures (listing + N pages) first")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    if args.save:
+        save_fixtures(args.save)
+
+    listings, pages, source = load_fixtures()
+    print(f"Using {source}: {len(listings)} listing(s), {len(pages)} intermediate page(s)")
+
+    for name in html_extract.BACKENDS:
+        for html_text in listings:
+            got = html_extract.extract_intermediate_links(html_text, BASE_URL, backend=name)
+            expected = html_extract.extract_intermediate_links(html_text, BASE_URL, backend="bs4")
+            assert list(got.items()) == list(expected.items()), f"{name}: listing output differs from bs4"
+        for html_text in pages:
+            got = html_extract.parse_intermediate_page(html_text, backend=name)
+            assert got == html_extract.parse_intermediate_page(html_text, backend="bs4"), f"{name}: page output differs from bs4"
+    print("All backends match the bs4 reference output.\n")
+
+    print(f"{'backend':<8} {'listing (ms)':>13} {'page (ms)':>10} {'speedup':>14}")
+    reference = None
+    for name in html_extract.BACKENDS:
+        listing_time = time_per_call(lambda h: html_extract.extract_intermediate_links(h, BASE_URL, backend=name), listings, args.repeat)
+        page_time = time_per_call(lambda h: html_extract.parse_intermediate_page(h, backend=name), pages, args.repeat)
+        reference = reference or (listing_time, page_time)
+        speedup = f"{reference[0] / listing_time:.1f}x / {reference[1] / page_time:.1f}x"
+        print(f"{name:<8} {listing_time * 1000:>13.2f} {page_time * 1000:>10.2f} {speedup:>14}")
+
+if __name__ == "__main__":
+    main()
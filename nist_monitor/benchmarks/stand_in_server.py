@@ -0,0 +1,352 @@
+"""Local stand-in for csrc.nist.gov and nvlpubs.nist.gov used by the engine benchmark.
+
+Serves the synthetic SP listing, publication pages and PDFs from
+synthetic_nist.py with ETag/Last-Modified, conditional GETs and Range
+requests, and can inject latency, a per-response bandwidth cap and 503
+errors. Per-document timings (first page request to last PDF byte) are
+recorded server-side so every engine is measured the same way.
+
+HTTP/1.1 is served by the standard library, optionally over TLS. HTTP/2
+needs TLS for ALPN and is served by hypercorn when it is installed.
+
+    python benchmarks/stand_in_server.py --docs 50 --pdf-size 2 --latency 0.05
+    python benchmarks/stand_in_server.py --http2    # TLS + HTTP/2 via hypercorn
+"""
+import os
+import ssl
+import json
+import time
+import socket
+import random
+import asyncio
+import hashlib
+import tempfile
+import argparse
+import threading
+import subprocess
+import importlib.util
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qsl
+import synthetic_nist
+
+CHUNK_SIZE = 64 * 1024  # Write size, and the granularity of the bandwidth cap
+LAST_MODIFIED = "Mon, 01 Jan 2024 00:00:00 GMT"
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list (None if empty)."""
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+class StandIn:
+    """Documents, fault injection settings and per-document timings of one server.
+
+    `respond` is shared by the HTTP/1.1 and HTTP/2 front ends; it returns the
+    status, headers and body of a request, plus the document whose PDF the
+    body completes so the front end can call `body_sent` once it is written.
+    """
+
+    def __init__(self, docs=50, pdf_size=1024 * 1024, latency=0.0, bandwidth=None, error_rate=0.0, seed=0, page_size=None):
+        self.docs = synthetic_nist.document_ids(docs, seed)
+        self.page_size = page_size  # Listing entries per page, None for one page
+        self.pdf_size = pdf_size
+        self.latency = latency
+        self.bandwidth = bandwidth  # Bytes/s per response, None for no cap
+        self.error_rate = error_rate
+        self.seed = seed
+        self.base_url = ""  # Set once the server is bound; PDF links point back at it
+        self._pages = {synthetic_nist.document_path(doc): doc for doc in self.docs}
+        self._pdfs = {synthetic_nist.pdf_path(doc): doc for doc in self.docs}
+        self._bodies = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Clears the timings and counters before the next engine runs."""
+        with self._lock:
+            self._started = {}
+            self._finished = {}
+            self.requests = 0
+            self.errors_injected = 0
+            self.bytes_sent = 0
+
+    def stats(self):
+        """Completed documents, bytes and sorted per-document latencies."""
+        with self._lock:
+            latencies = sorted(self._finished[doc] - self._started.get(doc, self._finished[doc]) for doc in self._finished)
+            return {
+                "documents": len(self._finished),
+                "pdf_bytes": len(self._finished) * self.pdf_size,
+                "requests": self.requests,
+                "errors_injected": self.errors_injected,
+                "bytes_sent": self.bytes_sent,
+                "latencies": latencies,
+            }
+
+    def _pdf_body(self, doc):
+        with self._lock:
+            if doc not in self._bodies:
+                block = hashlib.sha256(synthetic_nist.pdf_path(doc).encode()).digest()
+                self._bodies[doc] = (b"%PDF-1.7\n" + block * (self.pdf_size // len(block) + 1))[:self.pdf_size]
+            return self._bodies[doc]
+
+    def _inject_error(self):
+        with self._lock:
+            self.requests += 1
+            if self.error_rate and self._rng.random() < self.error_rate:
+                self.errors_injected += 1
+                return True
+        return False
+
+    def body_sent(self, doc, nbytes):
+        """Records bytes written, and the completion time of a finished PDF."""
+        with self._lock:
+            self.bytes_sent += nbytes
+            if doc is not None:
+                self._finished[doc] = time.monotonic()
+
+    def pace(self, started, sent):
+        """Seconds to sleep so a response stays under the bandwidth cap."""
+        if not self.bandwidth:
+            return 0.0
+        return max(0.0, sent / self.bandwidth - (time.monotonic() - started))
+
+    def _listing(self, target):
+        if not self.page_size:
+            return synthetic_nist.listing_page(self.docs, self.seed)
+        query = dict(parse_qsl(target.partition("?")[2]))
+        pages = -(-len(self.docs) // self.page_size)
+        page = min(max(1, int(query.get("page", 1))), pages)
+        docs = self.docs[(page - 1) * self.page_size:page * self.page_size]
+        return synthetic_nist.listing_page(docs, self.seed + page, synthetic_nist.pagination_links(page, pages))
+
+    def respond(self, method, target, headers):
+        """Returns (status, headers, body, completed_doc) for one request.
+
+        `headers` must have lower-case names.
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        path = target.split("?")[0]
+        if path == "/publications/sp":
+            with self._lock:
+                self.requests += 1
+            body = self._listing(target).encode()
+            return 200, {"Content-Type": "text/html; charset=utf-8"}, body, None
+
+        doc = self._pages.get(path)
+        if doc is not None:
+            if method == "GET":
+                with self._lock:
+                    self._started.setdefault(doc, time.monotonic())
+            if self._inject_error():
+                return 503, {"Retry-After": "1"}, b"Service Unavailable", None
+            etag = f'"page-{hashlib.sha1(path.encode()).hexdigest()[:12]}"'
+            validators = {"ETag": etag, "Last-Modified": LAST_MODIFIED}
+            if headers.get("if-none-match") == etag:
+                return 304, validators, b"", None
+            body = synthetic_nist.intermediate_page(doc, self.seed, self.base_url).encode()
+            return 200, {"Content-Type": "text/html; charset=utf-8", **validators}, body, None
+
+        doc = self._pdfs.get(path)
+        if doc is not None:
+            if self._inject_error():
+                return 503, {"Retry-After": "1"}, b"Service Unavailable", None
+            body = self._pdf_body(doc)
+            etag = f'"pdf-{hashlib.sha1(path.encode()).hexdigest()[:12]}"'
+            validators = {"ETag": etag, "Last-Modified": LAST_MODIFIED, "Accept-Ranges": "bytes"}
+            if headers.get("if-none-match") == etag:
+                return 304, validators, b"", None
+            byte_range = headers.get("range", "")
+            if byte_range.startswith("bytes=") and headers.get("if-range", etag) in (etag, LAST_MODIFIED):
+                first, _, last = byte_range[6:].partition("-")
+                first = int(first)
+                last = min(int(last), len(body) - 1) if last else len(body) - 1
+                if first >= len(body):
+                    return 416, {"Content-Range": f"bytes */{len(body)}"}, b"", None
+                validators["Content-Range"] = f"bytes {first}-{last}/{len(body)}"
+                completed = doc if last == len(body) - 1 and method == "GET" else None
+                return 206, {"Content-Type": "application/pdf", **validators}, body[first:last + 1], completed
+            return 200, {"Content-Type": "application/pdf", **validators}, body, doc if method == "GET" else None
+
+        return 404, {"Content-Type": "text/plain"}, b"Not Found", None
+
+def _handler_class(stand_in):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _serve(self):
+            headers = {name.lower(): value for name, value in self.headers.items()}
+            status, response_headers, body, completed = stand_in.respond(self.command, self.path, headers)
+            self.send_response(status)
+            for name, value in response_headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if self.command == "HEAD" or status == 304:
+                return
+            started = time.monotonic()
+            for offset in range(0, len(body), CHUNK_SIZE):
+                time.sleep(stand_in.pace(started, offset))
+                self.wfile.write(body[offset:offset + CHUNK_SIZE])
+            stand_in.body_sent(completed, len(body))
+
+        do_GET = _serve
+        do_HEAD = _serve
+
+    return Handler
+
+def _asgi_app(stand_in):
+    async def app(scope, receive, send):
+        if scope["type"] == "lifespan":
+            while (message := await receive())["type"] != "lifespan.shutdown":
+                await send({"type": "lifespan.startup.complete"})
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+        headers = {name.decode("latin-1").lower(): value.decode("latin-1") for name, value in scope["headers"]}
+        target = scope["path"] + (f"?{scope['query_string'].decode()}" if scope["query_string"] else "")
+        status, response_headers, body, completed = await asyncio.to_thread(stand_in.respond, scope["method"], target, headers)
+        response_headers = {**response_headers, "Content-Length": str(len(body))}
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(name.lower().encode(), value.encode()) for name, value in response_headers.items()],
+        })
+        if scope["method"] == "HEAD" or status == 304:
+            body = b""
+        started = time.monotonic()
+        for offset in range(0, len(body), CHUNK_SIZE):
+            await asyncio.sleep(stand_in.pace(started, offset))
+            await send({"type": "http.response.body", "body": body[offset:offset + CHUNK_SIZE], "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+        if body:
+            stand_in.body_sent(completed, len(body))
+
+    return app
+
+def make_certificate(directory):
+    """Writes a self-signed certificate for 127.0.0.1; returns (certfile, keyfile).
+
+    Engines trust it through SSL_CERT_FILE, which httpx honours.
+    """
+    certfile, keyfile = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-keyout", keyfile, "-out", certfile, "-subj", "/CN=127.0.0.1",
+         "-addext", "subjectAltName=IP:127.0.0.1"],
+        check=True, capture_output=True,
+    )
+    return certfile, keyfile
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def serve(stand_in, port=0, certificate=None, http2=False):
+    """Starts the server in a background thread; returns a function that stops it.
+
+    certificate is a (certfile, keyfile) pair and enables TLS; http2 also
+    needs it and requires hypercorn.
+    """
+    scheme = "https" if certificate else "http"
+    if http2:
+        if not certificate:
+            raise ValueError("HTTP/2 is negotiated over TLS; a certificate is required")
+        from hypercorn.config import Config
+        from hypercorn.asyncio import serve as hypercorn_serve
+        port = port or _free_port()
+        config = Config()
+        config.bind = [f"127.0.0.1:{port}"]
+        config.certfile, config.keyfile = certificate
+        config.accesslog = None
+        loop = asyncio.new_event_loop()
+        shutdown = asyncio.Event()
+        ready = threading.Event()
+
+        async def run():
+            ready.set()
+            await hypercorn_serve(_asgi_app(stand_in), config, shutdown_trigger=shutdown.wait)
+
+        thread = threading.Thread(target=loop.run_until_complete, args=(run(),), daemon=True)
+        thread.start()
+        ready.wait()
+        stand_in.base_url = f"{scheme}://127.0.0.1:{port}"
+        time.sleep(0.5)  # Let hypercorn bind before the first engine connects
+
+        def stop():
+            loop.call_soon_threadsafe(shutdown.set)
+            thread.join(timeout=5)
+        return stop
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), _handler_class(stand_in))
+    server.daemon_threads = True
+    if certificate:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(*certificate)
+        context.set_alpn_protocols(["http/1.1"])
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+    stand_in.base_url = f"{scheme}://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def stop():
+        server.shutdown()
+        server.server_close()
+    return stop
+
+def add_server_arguments(parser):
+    """Adds the catalogue and fault-injection options shared with bench_engines.py."""
+    parser.add_argument("--docs", type=int, default=40, help="documents in the synthetic catalogue")
+    parser.add_argument("--pdf-size", type=float, default=1.0, help="size of each PDF in MB")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added before every response")
+    parser.add_argument("--bandwidth", type=float, help="per-response cap in MB/s")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of page/PDF requests answered with 503")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--page-size", type=int, help="split the listing into pages of this many entries")
+    parser.add_argument("--tls", action="store_true", help="serve HTTP/1.1 over TLS")
+    parser.add_argument("--http2", action="store_true", help="serve HTTP/2 over TLS (needs hypercorn)")
+
+def check_server_arguments(parser, args):
+    if args.http2 and importlib.util.find_spec("hypercorn") is None:
+        parser.error("--http2 needs hypercorn (pip install hypercorn)")
+
+def stand_in_from_args(args):
+    return StandIn(
+        docs=args.docs,
+        pdf_size=int(args.pdf_size * 1024 * 1024),
+        latency=args.latency,
+        bandwidth=args.bandwidth * 1024 * 1024 if args.bandwidth else None,
+        error_rate=args.error_rate,
+        seed=args.seed,
+        page_size=args.page_size,
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_server_arguments(parser)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    check_server_arguments(parser, args)
+
+    stand_in = stand_in_from_args(args)
+    with tempfile.TemporaryDirectory() as cert_dir:
+        certificate = make_certificate(cert_dir) if args.tls or args.http2 else None
+        stop = serve(stand_in, args.port, certificate, args.http2)
+        print(f"Serving {len(stand_in.docs)} documents at {stand_in.base_url}/publications/sp (Ctrl-C to stop)")
+        if certificate:
+            print(f"Trust the certificate with SSL_CERT_FILE={certificate[0]}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            stop()
+            stats = stand_in.stats()
+            stats["latencies"] = {"p50": percentile(stats["latencies"], 0.5), "p99": percentile(stats["latencies"], 0.99)}
+            print(json.dumps(stats, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Synthetic stand-ins for the csrc.nist.gov SP listing and publication pages.
+
+The markup imitates the real pages closely enough to exercise the extractors
+(navigation chrome, inline scripts, entities, nested markup inside links) and
+is deterministic for a given seed, so benchmark runs are comparable.
+"""
+import random
+
+SERIES = ["800", "1800", "500"]
+
+def document_ids(count, seed=0):
+    """Returns `count` unique SP identifiers such as ('800', '53', 'r5')."""
+    rng = random.Random(seed)
+    ids = []
+    seen = set()
+    while len(ids) < count:
+        doc = (rng.choice(SERIES), str(rng.randint(1, 300)), rng.choice(["", "", "r1", "r2", "r5"]))
+        if doc not in seen:
+            seen.add(doc)
+            ids.append(doc)
+    return ids
+
+def document_path(doc):
+    series, number, revision = doc
+    return f"/pubs/sp/{series}/{number}/{revision + '/' if revision else ''}final"
+
+def document_title(doc):
+    series, number, revision = doc
+    return f"SP {series}-{number}" + (f" Rev. {revision[1:]}" if revision else "")
+
+def pdf_path(doc):
+    series, number, revision = doc
+    return f"/nistpubs/SpecialPublications/NIST.SP.{series}-{number}{revision}.pdf"
+
+def _chrome(rng):
+    nav = "".join(
+        f'<li class="nav-item"><a class="nav-link" href="/topics/{rng.randint(1, 999)}">Topic &amp; area {i}</a></li>'
+        for i in range(120)
+    )
+    script = '<script>var t = "<a href=\\"/pubs/sp/fake\\">x</a>"; window.dataLayer = [];</script>'
+    return f'<header><nav><ul class="nav">{nav}</ul></nav></header>{script}'
+
+def listing_page(docs, seed=0, pagination=""):
+    """Renders the /publications/sp listing for the given documents."""
+    rng = random.Random(seed)
+    rows = []
+    for i, doc in enumerate(docs):
+        rows.append(
+            f'<tr id="result-{i}"><td class="pub-series">SP</td>'
+            f'<td><a id="pub-title-link-{i}" href="{document_path(doc)}">{document_title(doc)}</a></td>'
+            f'<td>Guide to <em>Security</em> &#8212; Vol. {i}<!-- note --></td>'
+            f'<td class="pub-date">{rng.randint(1, 12)}/{rng.randint(1, 28)}/20{rng.randint(10, 24)}</td>'
+            f'<td><a href="/publications/detail/sp/{i}">Details</a></td></tr>'
+        )
+    return (
+        '<!DOCTYPE html><html lang="en"><head><meta charset="utf-8">'
+        '<title>NIST Special Publications (SPs) | CSRC</title>'
+        '<meta name="description" content="Special Publications listing">'
+        '<link rel="stylesheet" href="/css/site.css"><style>td a { color: #00f; }</style></head>'
+        f'<body>{_chrome(rng)}<main><table class="table">{"".join(rows)}</table>{pagination}</main>'
+        '<footer><p>&copy; NIST &nbsp;|&nbsp; Privacy</p></footer></body></html>'
+    )
+
+def pagination_links(page, pages, path="/publications/sp"):
+    """Renders a CSRC-style pager for page `page` of `pages`, eliding the middle."""
+    shown = sorted({1, 2, page - 1, page, page + 1, pages - 1, pages} & set(range(1, pages + 1)))
+    items = []
+    for previous, number in zip([0] + shown, shown):
+        if number - previous > 1:
+            items.append('<li class="page-item disabled"><span>&hellip;</span></li>')
+        active = ' active' if number == page else ''
+        items.append(f'<li class="page-item{active}"><a class="page-link" href="{path}?page={number}&amp;sortBy=releasedate">{number}</a></li>')
+    if page < pages:
+        items.append(f'<li class="page-item"><a class="page-link" rel="next" href="{path}?page={page + 1}&amp;sortBy=releasedate">Next</a></li>')
+    return f'<nav aria-label="Search results pages"><ul class="pagination">{"".join(items)}</ul></nav>'
+
+def intermediate_page(doc, seed=0, pdf_base="https://nvlpubs.nist.gov"):
+    """Renders the publication page of one document."""
+    rng = random.Random(f"{seed}-{document_path(doc)}")
+    abstract = " ".join(rng.choice(["security", "controls", "privacy", "systems", "risk", "guidance"]) for _ in range(120))
+    related = "".join(f'<li><a href="/pubs/sp/800/{rng.randint(1, 300)}/final">Related {i}</a></li>' for i in range(40))
+    return (
+        '<!DOCTYPE html><html lang="en"><head><meta charset="utf-8">'
+        f'<title>{document_title(doc)} | CSRC</title>'
+        f'<meta name="description" content="{document_title(doc)}: {abstract[:150]} &amp; more">'
+        f'</head><body>{_chrome(rng)}<main><h1>{document_title(doc)}</h1>'
+        f'<p class="abstract">{abstract}</p>'
+        f'<a href="https://doi.org/10.6028/NIST.SP.{doc[0]}-{doc[1]}">DOI</a>'
+        f'<a class="download" href="{pdf_base}{pdf_path(doc)}">Local Download</a>'
+        f'<ul class="related">{related}</ul></main></body></html>'
+    )
@@ -1,17 +1,177 @@
+"""Concurrent latency/throughput probe for download mirrors.
+
+Fetches each URL `--repeat` times with `--concurrency` requests in flight,
+once per protocol (HTTP/1.1, HTTP/2) and chunk size, and times every phase
+separately: DNS, TCP connect, TLS, TTFB (request sent to response headers)
+and transfer (headers to last byte). Prints p50/p90/p99 per configuration
+and can write every sample as JSON, or append a summary line to a history
+file for trend tracking.
+
+    python server_response_time.py
+    python server_response_time.py URL [URL ...] --concurrency 8 --repeat 10
+    python server_response_time.py --url-file urls.txt --chunk-kb 8,128,1024 --history probe.jsonl
+"""
+import sys
+import json
 import time
-import requests
+import socket
+import argparse
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+
+DEFAULT_URL = "https://nvlpubs.nist.gov/nistpubs/SpecialPublications/NIST.SP.800-40r4.pdf"  # Example file
+PHASES = ["dns", "connect", "tls", "ttfb", "transfer", "total"]
+PROTOCOLS = {"http1": False, "http2": True}
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list (None if empty)."""
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def resolve(url):
+    """Times a DNS lookup of the URL's host."""
+    parts = urlsplit(url)
+    start = time.perf_counter()
+    socket.getaddrinfo(parts.hostname, parts.port or (443 if parts.scheme == "https" else 80), type=socket.SOCK_STREAM)
+    return time.perf_counter() - start
+
+def probe(client, url, chunk_size):
+    """Fetches url once and returns its timings; phases that didn't happen are None.
+
+    connect and tls are only set when the request opened a new connection.
+    httpcore repeats the DNS lookup inside connect, usually from the
+    resolver cache, so `dns` is measured separately just before the request.
+    """
+    sample = {"url": url, "chunk_size": chunk_size, **dict.fromkeys(PHASES)}
+    events = {}
+
+    def trace(event, info):
+        events[event.split(".", 1)[1] if event.startswith(("http11.", "http2.")) else event] = time.perf_counter()
+
+    try:
+        sample["dns"] = resolve(url)
+        start = time.perf_counter()
+        with client.stream("GET", url, extensions={"trace": trace}) as response:
+            headers_done = time.perf_counter()
+            response.raise_for_status()
+            size = 0
+            for chunk in response.iter_bytes(chunk_size):
+                size += len(chunk)
+        end = time.perf_counter()
+    except Exception as e:
+        sample["error"] = f"{type(e).__name__}: {e}"
+        return sample
+
+    if "connection.connect_tcp.started" in events:
+        sample["connect"] = events["connection.connect_tcp.complete"] - events["connection.connect_tcp.started"]
+    if "connection.start_tls.started" in events:
+        sample["tls"] = events["connection.start_tls.complete"] - events["connection.start_tls.started"]
+    sent = events.get("send_request_headers.started", start)
+    sample["ttfb"] = events.get("receive_response_headers.complete", headers_done) - sent
+    sample["transfer"] = end - headers_done
+    sample["total"] = end - start
+    sample["bytes"] = size
+    sample["mb_per_s"] = size / (end - headers_done) / (1024 * 1024) if end > headers_done else None
+    sample["http_version"] = response.http_version
+    sample["status"] = response.status_code
+    return sample
+
+def run_configuration(urls, protocol, chunk_size, args):
+    """Probes every URL `repeat` times for one protocol and chunk size."""
+    http2 = PROTOCOLS[protocol]
+    jobs = [url for _ in range(args.repeat) for url in urls]
+    shared = httpx.Client(http2=http2, timeout=args.timeout, follow_redirects=True) if args.reuse else None
+
+    def run(url):
+        if shared:
+            return probe(shared, url, chunk_size)
+        # A fresh client per sample, so every sample pays DNS, connect and TLS
+        with httpx.Client(http2=http2, timeout=args.timeout, follow_redirects=True) as client:
+            return probe(client, url, chunk_size)
+
+    try:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            samples = list(executor.map(run, jobs))
+    finally:
+        if shared:
+            shared.close()
+    for sample in samples:
+        sample["protocol"] = protocol
+    return samples
+
+def summarize(samples):
+    """p50/p90/p99 of each phase (seconds) and of per-sample MB/s."""
+    ok = [s for s in samples if "error" not in s]
+    summary = {"samples": len(samples), "errors": len(samples) - len(ok)}
+    for key in PHASES + ["mb_per_s"]:
+        values = [s[key] for s in ok]
+        summary[key] = {f"p{int(q * 100)}": percentile(values, q) for q in (0.5, 0.9, 0.99)}
+    summary["http_versions"] = sorted({s["http_version"] for s in ok})
+    return summary
+
+def print_summary(protocol, chunk_size, summary):
+    def ms(value):
+        return f"{value * 1000:8.1f}" if value is not None else f"{'-':>8}"
+
+    versions = ", ".join(summary["http_versions"]) or "none"
+    print(f"\n{protocol}, {chunk_size // 1024} KB chunks ({versions}): {summary['samples']} samples, {summary['errors']} errors")
+    print(f"  {'phase':<10} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}")
+    for phase in PHASES:
+        stats = summary[phase]
+        print(f"  {phase:<10} {ms(stats['p50'])} {ms(stats['p90'])} {ms(stats['p99'])}")
+    rate = summary["mb_per_s"]
+    print(f"  {'MB/s':<10} " + " ".join(f"{rate[p]:8.2f}" if rate[p] is not None else f"{'-':>8}" for p in ("p50", "p90", "p99")))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("urls", nargs="*", help=f"URLs to probe (default: {DEFAULT_URL})")
+    parser.add_argument("--url-file", help="file with one URL per line")
+    parser.add_argument("--concurrency", type=int, default=4, help="requests in flight at once")
+    parser.add_argument("--repeat", type=int, default=5, help="samples per URL and configuration")
+    parser.add_argument("--protocols", default="http1,http2", help="comma-separated: http1, http2")
+    parser.add_argument("--chunk-kb", default="8,128", help="comma-separated read sizes in KB")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--reuse", action="store_true", help="share one pooled client, so most samples skip connect/TLS")
+    parser.add_argument("--json", metavar="PATH", help="write settings, summaries and every sample to PATH")
+    parser.add_argument("--history", metavar="PATH", help="append one summary line per run to a JSONL file")
+    args = parser.parse_args()
 
-url = "https://nvlpubs.nist.gov/nistpubs/SpecialPublications/NIST.SP.800-40r4.pdf"  # Example file
+    urls = list(args.urls)
+    if args.url_file:
+        with open(args.url_file, "r", encoding="utf-8") as file:
+            urls += [line.strip() for line in file if line.strip() and not line.startswith("#")]
+    urls = urls or [DEFAULT_URL]
+    protocols = [p.strip() for p in args.protocols.split(",") if p.strip()]
+    if any(p not in PROTOCOLS for p in protocols):
+        parser.error(f"--protocols must be a subset of: {', '.join(PROTOCOLS)}")
+    chunk_sizes = [int(kb) * 1024 for kb in args.chunk_kb.split(",")]
 
-start_time = time.time()
-response = requests.get(url, stream=True)
-total_size = int(response.headers.get('content-length', 0))
+    print(f"Probing {len(urls)} URL(s) x {args.repeat} with concurrency {args.concurrency}")
+    results = []
+    for protocol in protocols:
+        for chunk_size in chunk_sizes:
+            samples = run_configuration(urls, protocol, chunk_size, args)
+            summary = summarize(samples)
+            print_summary(protocol, chunk_size, summary)
+            results.append({"protocol": protocol, "chunk_size": chunk_size, "summary": summary, "samples": samples})
+            for sample in samples:
+                if "error" in sample:
+                    print(f"  error: {sample['url']}: {sample['error']}", file=sys.stderr)
 
-downloaded = 0
-for chunk in response.iter_content(chunk_size=8192):
-    downloaded += len(chunk)
-end_time = time.time()
+    timestamp = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    settings = {key: value for key, value in vars(args).items() if key not in ("json", "history")}
+    settings["urls"] = urls
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump({"timestamp": timestamp, "settings": settings, "results": results}, file, indent=2)
+    if args.history:
+        with open(args.history, "a", encoding="utf-8") as file:
+            summaries = [{key: r[key] for key in ("protocol", "chunk_size", "summary")} for r in results]
+            file.write(json.dumps({"timestamp": timestamp, "settings": settings, "results": summaries}) + "\n")
 
-elapsed = end_time - start_time
-speed = downloaded / elapsed / 1024 / 1024  # Convert to MB/s
-print(f"Downloaded {total_size / 1024 / 1024:.2f} MB in {elapsed:.2f} seconds ({speed:.2f} MB/s)")
\ No newline at end of file
+if __name__ == "__main__":
+    main()